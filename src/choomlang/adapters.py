@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import json
 import base64
+import os
 import socket
 from pathlib import Path, PurePosixPath
 from typing import Any, Callable
@@ -28,11 +29,13 @@ def _validate_relative_artifact_path(raw_path: str) -> PurePosixPath:
 
 def resolve_artifact_path(base_dir: Path, raw_path: str) -> tuple[Path, str]:
     rel_path = _validate_relative_artifact_path(raw_path)
-    resolved = (base_dir / rel_path).resolve()
-    base_resolved = base_dir.resolve()
-    if resolved != base_resolved and base_resolved not in resolved.parents:
+    root = os.path.realpath(base_dir)
+    # String joins avoid building intermediate Path objects on every adapter call.
+    # Resolving first means a symlink inside artifacts cannot point the write elsewhere.
+    resolved = os.path.realpath(os.path.join(root, rel_path))
+    if resolved != root and not resolved.startswith(os.path.join(root, "")):
         raise RunError(f"unsafe artifact path (must stay within artifacts): {raw_path}")
-    return resolved, rel_path.as_posix()
+    return Path(resolved), rel_path.as_posix()
 
 
 def _adapter_echo(
@@ -288,6 +291,8 @@ def _adapter_a1111_txt2img(
         cancel_on_timeout = bool(context.get("cancel_on_timeout", False))
     if "cancel_on_timeout" in params:
         cancel_on_timeout = bool(params.get("cancel_on_timeout"))
+    # None falls back to print()'s default of sys.stdout.
+    out = context.get("out") if isinstance(context, dict) else None
 
     seed_value = _as_int(params, "seed")
 
@@ -333,12 +338,17 @@ def _adapter_a1111_txt2img(
                     interrupted = _a1111_interrupt(base_url, request_timeout)
                     print(
                         f"a1111_txt2img timeout; interrupt {'succeeded' if interrupted else 'failed'}",
+                        file=out,
                         flush=True,
                     )
                 raise RunError(f"a1111_txt2img request timed out after {request_timeout}s") from exc
             last_exc = exc
             if attempt < attempts and _a1111_should_retry(exc):
-                print(f"a1111_txt2img transient error (attempt {attempt}/{attempts}): {exc}; retrying", flush=True)
+                print(
+                    f"a1111_txt2img transient error (attempt {attempt}/{attempts}): {exc}; retrying",
+                    file=out,
+                    flush=True,
+                )
                 import time
                 time.sleep(0.2 * attempt)
                 continue
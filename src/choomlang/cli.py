@@ -3,13 +3,16 @@
 from __future__ import annotations
 
 import argparse
+import io
 import json
 import os
 import sys
+from contextvars import ContextVar
 from pathlib import Path
+from typing import TextIO
 
 from . import __version__
-from .dsl import DSLParseError, format_dsl, parse_dsl
+from .dsl import DSLParseError, format_dsl, parse_dsl, parse_validate_serialize
 from .protocol import (
     KNOWN_OPS,
     KNOWN_TARGETS,
@@ -17,7 +20,7 @@ from .protocol import (
     canonical_json_schema,
     script_to_dsl,
     script_to_jsonl,
-    parse_script_text,
+    validate_script_text,
 )
 from .relay import OllamaClient, RelayError, run_probe, run_relay
 from .run import RunError
@@ -34,8 +37,23 @@ from .profiles import (
 )
 
 
+# (out, err) for the parse in progress; None means the process streams.
+_PARSER_STREAMS: ContextVar[tuple[TextIO, TextIO] | None] = ContextVar("_PARSER_STREAMS", default=None)
+
+
+class _ChoomArgumentParser(argparse.ArgumentParser):
+    """ArgumentParser whose usage, help, version and error text go to the caller's streams."""
+
+    def _print_message(self, message: str, file: TextIO | None = None) -> None:
+        streams = _PARSER_STREAMS.get()
+        if streams is not None:
+            # argparse passes sys.stdout for help/version and sys.stderr for usage errors.
+            file = streams[0] if file is sys.stdout else streams[1]
+        super()._print_message(message, file)
+
+
 def build_parser() -> argparse.ArgumentParser:
-    parser = argparse.ArgumentParser(prog="choom", description="ChoomLang CLI")
+    parser = _ChoomArgumentParser(prog="choom", description="ChoomLang CLI")
     parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
     sub = parser.add_subparsers(dest="command", required=True)
 
@@ -47,32 +65,40 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Use compact JSON output for DSL -> JSON",
     )
+    p_translate.set_defaults(func=_cmd_translate)
 
     p_teach = sub.add_parser("teach", help="Explain DSL token-by-token")
     p_teach.add_argument("input", help="DSL line")
+    p_teach.set_defaults(func=_cmd_teach)
 
     p_validate = sub.add_parser("validate", help="Validate a DSL line")
     p_validate.add_argument("input", nargs="?", help="DSL line or '-' / stdin")
     p_validate.add_argument("--lenient", action="store_true", help="Allow trivial trailing punctuation token")
+    p_validate.set_defaults(func=_cmd_validate)
 
     p_fmt = sub.add_parser("fmt", help="Canonicalize one DSL line")
     p_fmt.add_argument("input", nargs="?", help="DSL line or '-' / stdin")
     p_fmt.add_argument("--lenient", action="store_true", help="Allow trivial trailing punctuation token")
+    p_fmt.set_defaults(func=_cmd_fmt)
 
     p_lint = sub.add_parser("lint", help="Warn on non-canonical or suspicious DSL patterns")
     p_lint.add_argument("input", nargs="?", help="DSL line or '-' / stdin")
     p_lint.add_argument("--lenient", action="store_true", help="Allow standalone trailing punctuation tokens")
     p_lint.add_argument("--strict-ops", action="store_true", help="Warn for unknown ops")
     p_lint.add_argument("--strict-targets", action="store_true", help="Warn for unknown targets")
+    p_lint.set_defaults(func=_cmd_lint)
 
     p_profile = sub.add_parser("profile", help="Manage and apply parameter profiles")
     profile_sub = p_profile.add_subparsers(dest="profile_command", required=True)
     p_profile_list = profile_sub.add_parser("list", help="List available profiles")
     p_profile_list.add_argument("--tag", help="Filter profiles by tag (case-insensitive exact match)")
+    p_profile_list.set_defaults(func=_cmd_profile_list)
     p_profile_search = profile_sub.add_parser("search", help="Search profiles by substring")
     p_profile_search.add_argument("query", help="Case-insensitive substring for name/description/tags")
+    p_profile_search.set_defaults(func=_cmd_profile_search)
     p_profile_show = profile_sub.add_parser("show", help="Show one profile JSON")
     p_profile_show.add_argument("name", help="Profile name")
+    p_profile_show.set_defaults(func=_cmd_profile_show)
     p_profile_apply = profile_sub.add_parser("apply", help="Apply profile defaults to a DSL line")
     p_profile_apply.add_argument("name", help="Profile name")
     p_profile_apply.add_argument("dsl", help="DSL line")
@@ -83,6 +109,7 @@ def build_parser() -> argparse.ArgumentParser:
         default=[],
         help="Override one parameter using key=value (repeatable)",
     )
+    p_profile_apply.set_defaults(func=_cmd_profile_apply)
 
     p_run = sub.add_parser("run", help="Execute .choom scripts")
     p_run.add_argument("script", help="Path to a .choom script file (path/to/file.choom)")
@@ -106,6 +133,7 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="When A1111 txt2img times out, call /sdapi/v1/interrupt before failing",
     )
+    p_run.set_defaults(func=_cmd_run)
 
     p_script = sub.add_parser("script", help="Process multi-line ChoomLang scripts")
     p_script.add_argument("path", help="Script path or '-' for stdin")
@@ -114,19 +142,24 @@ def build_parser() -> argparse.ArgumentParser:
     mode = p_script.add_mutually_exclusive_group()
     mode.add_argument("--fail-fast", dest="fail_fast", action="store_true", default=True)
     mode.add_argument("--continue", dest="fail_fast", action="store_false")
+    p_script.set_defaults(func=_cmd_script)
 
     p_validate_script = sub.add_parser("validate-script", help="Validate a multi-line ChoomLang script")
     p_validate_script.add_argument("path", help="Script path or '-' for stdin")
+    p_validate_script.set_defaults(func=_cmd_validate_script)
 
     p_schema = sub.add_parser("schema", help="Emit JSON Schema for canonical payload JSON")
     p_schema.add_argument("--mode", choices=["strict", "permissive"], default="strict", help="Schema strictness mode")
+    p_schema.set_defaults(func=_cmd_schema)
 
     p_guard = sub.add_parser("guard", help="Print a reusable model repair prompt")
     p_guard.add_argument("--error", help="Optional parse/validation error text")
     p_guard.add_argument("--previous", help="Optional previous model output")
+    p_guard.set_defaults(func=_cmd_guard)
 
     p_completion = sub.add_parser("completion", help="Print shell completion script")
     p_completion.add_argument("shell", nargs="?", choices=["bash", "zsh", "powershell"], help="Shell type")
+    p_completion.set_defaults(func=_cmd_completion)
 
     p_relay = sub.add_parser("relay", help="Run a local Ollama-backed relay")
     p_relay.add_argument("--a-model", required=True, help="Model name for speaker A")
@@ -168,14 +201,60 @@ def build_parser() -> argparse.ArgumentParser:
     )
     p_relay.add_argument("--probe", action="store_true", help="Probe Ollama connectivity/model readiness and exit")
     p_relay.add_argument("--warm", action="store_true", help="Pre-warm both relay models before turn exchange")
+    p_relay.set_defaults(func=_cmd_relay)
 
     p_demo = sub.add_parser("demo", help="Run a predefined structured relay demo")
     p_demo.add_argument("--timeout", type=float, default=180.0, help="HTTP timeout in seconds for relay requests")
     p_demo.add_argument("--keep-alive", dest="keep_alive", type=float, default=300.0, help="Ollama keep_alive value in seconds")
+    p_demo.set_defaults(func=_cmd_demo)
 
     return parser
 
 
+_COMPLETION_COMMANDS = (
+    "translate",
+    "teach",
+    "validate",
+    "fmt",
+    "lint",
+    "profile",
+    "run",
+    "script",
+    "validate-script",
+    "schema",
+    "guard",
+    "completion",
+    "relay",
+    "demo",
+)
+
+# Rendered once at import; output depends only on the shell flavor.
+_COMPLETION_SCRIPTS = {
+    "bash": (
+        "# bash completion for choom\n"
+        "_choom_complete() {\n"
+        "  local cur prev words cword\n"
+        "  _init_completion || return\n"
+        f"  local cmds=\"{' '.join(_COMPLETION_COMMANDS)}\"\n"
+        "  if [[ $cword -eq 1 ]]; then\n"
+        '    COMPREPLY=( $(compgen -W "$cmds" -- "$cur") )\n'
+        "    return\n"
+        "  fi\n"
+        "}\n"
+        "complete -F _choom_complete choom\n"
+    ),
+    "zsh": f"#compdef choom\n_arguments '1:command:({' '.join(_COMPLETION_COMMANDS)})'\n",
+    "powershell": (
+        "Register-ArgumentCompleter -CommandName choom -ScriptBlock {\n"
+        "  param($wordToComplete, $commandAst, $cursorPosition)\n"
+        f"  {','.join(repr(cmd) for cmd in _COMPLETION_COMMANDS)} |\n"
+        '    Where-Object { $_ -like "$wordToComplete*" } |\n'
+        "    ForEach-Object { [System.Management.Automation.CompletionResult]::new($_, $_, 'ParameterValue', $_) }\n"
+        "}\n"
+    ),
+}
+
+
 def _detect_shell() -> str:
     shell = os.environ.get("SHELL", "")
     shell_name = os.path.basename(shell).lower()
@@ -189,13 +268,16 @@ def _detect_shell() -> str:
 
 
 def _completion_script(shell: str) -> str:
-    if shell == "bash":
-        return """# bash completion for choom\n_choom_complete() {\n  local cur prev words cword\n  _init_completion || return\n  local cmds=\"translate teach validate fmt lint profile run script validate-script schema guard completion relay demo\"\n  if [[ $cword -eq 1 ]]; then\n    COMPREPLY=( $(compgen -W \"$cmds\" -- \"$cur\") )\n    return\n  fi\n}\ncomplete -F _choom_complete choom\n"""
-    if shell == "zsh":
-        return """#compdef choom\n_arguments '1:command:(translate teach validate fmt lint profile run script validate-script schema guard completion relay demo)'\n"""
-    if shell == "powershell":
-        return """Register-ArgumentCompleter -CommandName choom -ScriptBlock {\n  param($wordToComplete, $commandAst, $cursorPosition)\n  'translate','teach','validate','fmt','lint','profile','run','script','validate-script','schema','guard','completion','relay','demo' |\n    Where-Object { $_ -like \"$wordToComplete*\" } |\n    ForEach-Object { [System.Management.Automation.CompletionResult]::new($_, $_, 'ParameterValue', $_) }\n}\n"""
-    raise ValueError("shell must be one of: bash, zsh, powershell")
+    try:
+        return _COMPLETION_SCRIPTS[shell]
+    except KeyError:
+        raise ValueError("shell must be one of: bash, zsh, powershell") from None
+
+
+def _write_lines(lines: list[str], out: TextIO) -> None:
+    """Write all lines in one call instead of one print per line."""
+    if lines:
+        out.write("\n".join(lines) + "\n")
 
 
 def _read_input(value: str | None) -> str:
@@ -253,18 +335,17 @@ def _lint_dsl(text: str, *, lenient: bool, strict_ops: bool, strict_targets: boo
             if token in {".", ",", ";", ":", "!", "?"}:
                 warnings.append(f"suspicious standalone punctuation token: {token!r}")
     try:
-        parsed = parse_dsl(text, lenient=lenient)
+        parsed, canonical, op_known, target_known = parse_validate_serialize(text, lenient=lenient)
     except DSLParseError as exc:
         errors.append(str(exc))
         return warnings, errors
 
-    canonical = format_dsl(text, lenient=lenient)
     if canonical != text.strip():
         warnings.append("non-canonical DSL formatting; run `choom fmt`")
 
-    if strict_ops and parsed.op not in KNOWN_OPS:
+    if strict_ops and not op_known:
         warnings.append(f"unknown op '{parsed.op}' in strict registry mode")
-    if strict_targets and parsed.target not in KNOWN_TARGETS:
+    if strict_targets and not target_known:
         warnings.append(f"unknown target '{parsed.target}' in strict registry mode")
 
     for key in parsed.params:
@@ -273,263 +354,313 @@ def _lint_dsl(text: str, *, lenient: bool, strict_ops: bool, strict_targets: boo
     return warnings, errors
 
 
-def _print_validation_suggestions(text: str, err: DSLParseError, *, lenient: bool) -> None:
+def _print_validation_suggestions(text: str, err: DSLParseError, *, lenient: bool, stream: TextIO) -> None:
     message = str(err)
     if "missing '='" in message:
-        print("hint: key/value params must use key=value (example: gen txt prompt=hello)", file=sys.stderr)
+        print("hint: key/value params must use key=value (example: gen txt prompt=hello)", file=stream)
     if "missing '='" in message and " in token '" in message:
         token = message.split(" in token '", 1)[1].split("'", 1)[0]
-        print(f"hint: did you mean {token}=<value>?", file=sys.stderr)
+        print(f"hint: did you mean {token}=<value>?", file=stream)
     if "index" in message and not lenient:
-        print("hint: if input ends with '.', try --lenient", file=sys.stderr)
+        print("hint: if input ends with '.', try --lenient", file=stream)
     if "trailing punctuation" in text or text.strip().endswith((".", ",", ";")):
         if not lenient:
-            print("hint: trailing punctuation is common; try --lenient", file=sys.stderr)
+            print("hint: trailing punctuation is common; try --lenient", file=stream)
 
 
-def main(argv: list[str] | None = None) -> int:
-    parser = build_parser()
-    args = parser.parse_args(argv)
+def _cmd_validate(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    text = _read_input(args.input)
+    try:
+        parsed = parse_dsl(text, lenient=args.lenient)
+    except DSLParseError as exc:
+        print(f"error: {exc}", file=err)
+        _print_validation_suggestions(text, exc, lenient=args.lenient, stream=err)
+        return 2
+    if parsed.op not in KNOWN_OPS:
+        print(f"hint: unknown op '{parsed.op}'. supported ops: {', '.join(KNOWN_OPS)}", file=err)
+    if parsed.target not in KNOWN_TARGETS:
+        print(
+            f"hint: unknown target '{parsed.target}'. supported targets: {', '.join(KNOWN_TARGETS)}",
+            file=err,
+        )
+    print("ok", file=out)
+    return 0
+
+
+def _cmd_fmt(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    print(format_dsl(_read_input(args.input), lenient=args.lenient), file=out)
+    return 0
+
+
+def _cmd_schema(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    print(json.dumps(canonical_json_schema(mode=args.mode), indent=2, sort_keys=True), file=out)
+    return 0
+
+
+def _cmd_translate(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    text = _read_input(args.input)
+    if args.reverse or text.lstrip()[:1] in ("{", "["):
+        print(json_text_to_dsl(text), file=out)
+        return 0
+    payload = dsl_to_json(text)
+    if args.compact:
+        print(json.dumps(payload, separators=(",", ":"), sort_keys=True), file=out)
+    else:
+        print(json.dumps(payload, indent=2, sort_keys=True), file=out)
+    return 0
+
+
+def _cmd_teach(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    print(explain_dsl(args.input), file=out)
+    return 0
+
+
+def _cmd_lint(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    lint_text = _read_input(args.input)
+    warnings, errors = _lint_dsl(
+        lint_text,
+        lenient=args.lenient,
+        strict_ops=args.strict_ops,
+        strict_targets=args.strict_targets,
+    )
+    for warning in warnings:
+        print(f"warn: {warning}", file=err)
+    for error in errors:
+        print(f"error: {error}", file=err)
+    if errors:
+        return 2
+    return 1 if warnings else 0
+
+
+def _cmd_profile_list(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    valid, invalid = discover_profiles()
+    for warning in invalid:
+        print(f"warn: skipping invalid profile ({warning})", file=err)
+    _write_lines(list_profiles(tag=args.tag), out)
+    return 0
+
+
+def _cmd_profile_search(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    _write_lines(search_profiles(args.query), out)
+    return 0
+
+
+def _cmd_profile_show(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    print(json.dumps(read_profile(args.name), indent=2, sort_keys=True), file=out)
+    return 0
+
+
+def _cmd_profile_apply(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    overrides = _parse_set_overrides(args.set_items)
+    print(apply_profile_to_dsl(args.name, args.dsl, overrides=overrides), file=out)
+    return 0
+
+
+def _cmd_run(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    a1111_url = args.a1111_url or os.environ.get("CHOOM_A1111_URL") or "http://127.0.0.1:7860"
+    env_a1111_timeout = os.environ.get("CHOOM_A1111_TIMEOUT")
+    a1111_timeout = args.a1111_timeout
+    if a1111_timeout is None and env_a1111_timeout not in {None, ""}:
+        a1111_timeout = float(env_a1111_timeout)
+    if a1111_timeout is None:
+        a1111_timeout = args.timeout
+    results = run_script(
+        args.script,
+        workdir=args.workdir,
+        resume=args.resume,
+        max_steps=args.max_steps,
+        dry_run=args.dry_run,
+        timeout=args.timeout,
+        keep_alive=args.keep_alive,
+        a1111_url=a1111_url,
+        a1111_timeout=a1111_timeout,
+        cancel_on_timeout=args.cancel_on_timeout,
+        out=out,
+        err=err,
+    )
+    _write_lines(results, out)
+    return 0
 
-    validate_text: str | None = None
 
-    try:
-        if args.command == "translate":
-            text = _read_input(args.input)
-            if args.reverse:
-                print(json_text_to_dsl(text))
-            else:
-                stripped = text.lstrip()
-                if stripped.startswith("{"):
-                    print(json_text_to_dsl(text))
-                else:
-                    payload = dsl_to_json(text)
-                    if args.compact:
-                        print(json.dumps(payload, separators=(",", ":"), sort_keys=True))
-                    else:
-                        print(json.dumps(payload, indent=2, sort_keys=True))
-            return 0
-
-        if args.command == "teach":
-            print(explain_dsl(args.input))
-            return 0
-
-        if args.command == "validate":
-            validate_text = _read_input(args.input)
-            parsed = parse_dsl(validate_text, lenient=args.lenient)
-            if parsed.op not in KNOWN_OPS:
-                print(f"hint: unknown op '{parsed.op}'. supported ops: {', '.join(KNOWN_OPS)}", file=sys.stderr)
-            if parsed.target not in KNOWN_TARGETS:
+def _cmd_script(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    script_text = _read_script(args.path)
+    if args.validate_only:
+        validate_script_text(script_text)
+        print("ok", file=out)
+        return 0
+
+    if args.to == "dsl":
+        outputs, errors = script_to_dsl(script_text, fail_fast=args.fail_fast)
+    else:
+        outputs, errors = script_to_jsonl(script_text, fail_fast=args.fail_fast)
+
+    _write_lines(outputs, out)
+    if errors:
+        err.write("".join(f"error: {error}\n" for error in errors))
+        return 2
+    return 0
+
+
+def _cmd_validate_script(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    validate_script_text(_read_script(args.path))
+    print("ok", file=out)
+    return 0
+
+
+def _cmd_guard(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    print(build_guard_prompt(error=args.error, previous=args.previous), file=out)
+    return 0
+
+
+def _cmd_completion(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    shell = args.shell or _detect_shell()
+    print(_completion_script(shell), end="", file=out)
+    return 0
+
+
+def _cmd_demo(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    print("=== ChoomLang Relay Demo (v0.6) ===", file=out)
+    print("Models: llama3.2:latest <-> qwen2.5:latest", file=out)
+    print("Saving transcript to choom_demo.jsonl", file=out)
+    demo_args = [
+        "relay",
+        "--a-model",
+        "llama3.2:latest",
+        "--b-model",
+        "qwen2.5:latest",
+        "--turns",
+        "4",
+        "--structured",
+        "--start",
+        'gen txt prompt="ChoomLang in action: describe a client-server protocol in 5 lines"',
+        "--log",
+        "choom_demo.jsonl",
+        "--timeout",
+        str(args.timeout),
+        "--keep-alive",
+        str(args.keep_alive),
+    ]
+    return main(demo_args, out=out, err=err)
+
+
+def _cmd_relay(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    client = OllamaClient(timeout=args.timeout, keep_alive=args.keep_alive)
+    if args.probe:
+        ok, report = run_probe(client=client, models=[args.a_model, args.b_model])
+        print("probe report:", file=out)
+        for entry in report:
+            if entry["kind"] == "tags":
+                status = "ok" if entry["ok"] else "fail"
                 print(
-                    f"hint: unknown target '{parsed.target}'. supported targets: {', '.join(KNOWN_TARGETS)}",
-                    file=sys.stderr,
+                    f"- /api/tags: {status} http={entry.get('http_status')} elapsed_ms={entry.get('elapsed_ms')}",
+                    file=out,
                 )
-            print("ok")
-            return 0
-
-        if args.command == "fmt":
-            print(format_dsl(_read_input(args.input), lenient=args.lenient))
-            return 0
-
-        if args.command == "lint":
-            lint_text = _read_input(args.input)
-            warnings, errors = _lint_dsl(
-                lint_text,
-                lenient=args.lenient,
-                strict_ops=args.strict_ops,
-                strict_targets=args.strict_targets,
-            )
-            for warning in warnings:
-                print(f"warn: {warning}", file=sys.stderr)
-            for error in errors:
-                print(f"error: {error}", file=sys.stderr)
-            if errors:
-                return 2
-            return 1 if warnings else 0
-
-        if args.command == "profile":
-            if args.profile_command == "list":
-                valid, invalid = discover_profiles()
-                for warning in invalid:
-                    print(f"warn: skipping invalid profile ({warning})", file=sys.stderr)
-                names = list_profiles(tag=args.tag)
-                for name in names:
-                    print(name)
-                return 0
-            if args.profile_command == "search":
-                for name in search_profiles(args.query):
-                    print(name)
-                return 0
-            if args.profile_command == "show":
-                print(json.dumps(read_profile(args.name), indent=2, sort_keys=True))
-                return 0
-            if args.profile_command == "apply":
-                overrides = _parse_set_overrides(args.set_items)
-                print(apply_profile_to_dsl(args.name, args.dsl, overrides=overrides))
-                return 0
-
-        if args.command == "run":
-            a1111_url = args.a1111_url or os.environ.get("CHOOM_A1111_URL") or "http://127.0.0.1:7860"
-            env_a1111_timeout = os.environ.get("CHOOM_A1111_TIMEOUT")
-            a1111_timeout = args.a1111_timeout
-            if a1111_timeout is None and env_a1111_timeout not in {None, ""}:
-                a1111_timeout = float(env_a1111_timeout)
-            if a1111_timeout is None:
-                a1111_timeout = args.timeout
-            results = run_script(
-                args.script,
-                workdir=args.workdir,
-                resume=args.resume,
-                max_steps=args.max_steps,
-                dry_run=args.dry_run,
-                timeout=args.timeout,
-                keep_alive=args.keep_alive,
-                a1111_url=a1111_url,
-                a1111_timeout=a1111_timeout,
-                cancel_on_timeout=args.cancel_on_timeout,
-            )
-            for line in results:
-                print(line)
-            return 0
-
-        if args.command == "script":
-            script_text = _read_script(args.path)
-            if args.validate_only:
-                parse_script_text(script_text)
-                print("ok")
-                return 0
-
-            if args.to == "dsl":
-                outputs, errors = script_to_dsl(script_text, fail_fast=args.fail_fast)
+                if entry.get("reason"):
+                    print(f"  reason: {entry['reason']}", file=out)
             else:
-                outputs, errors = script_to_jsonl(script_text, fail_fast=args.fail_fast)
-
-            for line in outputs:
-                print(line)
-            for err in errors:
-                print(f"error: {err}", file=sys.stderr)
-
-            if errors and not args.fail_fast:
-                return 2
-            if errors and args.fail_fast:
-                return 2
-            return 0
-
-        if args.command == "validate-script":
-            parse_script_text(_read_script(args.path))
-            print("ok")
-            return 0
-
-        if args.command == "schema":
-            print(json.dumps(canonical_json_schema(mode=args.mode), indent=2, sort_keys=True))
-            return 0
-
-        if args.command == "guard":
-            print(build_guard_prompt(error=args.error, previous=args.previous))
-            return 0
-
-        if args.command == "completion":
-            shell = args.shell or _detect_shell()
-            print(_completion_script(shell), end="")
-            return 0
-
-        if args.command == "demo":
-            print("=== ChoomLang Relay Demo (v0.6) ===")
-            print("Models: llama3.2:latest <-> qwen2.5:latest")
-            print("Saving transcript to choom_demo.jsonl")
-            demo_args = [
-                "relay",
-                "--a-model",
-                "llama3.2:latest",
-                "--b-model",
-                "qwen2.5:latest",
-                "--turns",
-                "4",
-                "--structured",
-                "--start",
-                'gen txt prompt="ChoomLang in action: describe a client-server protocol in 5 lines"',
-                "--log",
-                "choom_demo.jsonl",
-                "--timeout",
-                str(args.timeout),
-                "--keep-alive",
-                str(args.keep_alive),
-            ]
-            return main(demo_args)
+                status = "ok" if entry["ok"] else "fail"
+                print(
+                    f"- model {entry['model']}: {status} http={entry.get('http_status')} elapsed_ms={entry.get('elapsed_ms')}",
+                    file=out,
+                )
+                if entry.get("reason"):
+                    print(f"  reason: {entry['reason']}", file=out)
+        return 0 if ok else 2
+
+    transcript = run_relay(
+        client=client,
+        a_model=args.a_model,
+        b_model=args.b_model,
+        turns=args.turns,
+        seed=args.seed,
+        system_a=args.system_a,
+        system_b=args.system_b,
+        start=args.start,
+        strict=args.strict,
+        structured=args.structured,
+        use_schema=args.schema if args.structured else False,
+        allow_unknown_op=args.allow_unknown_op,
+        allow_unknown_target=args.allow_unknown_target,
+        fallback_enabled=not args.no_fallback,
+        no_repeat=args.no_repeat,
+        raw_json=args.raw_json,
+        log_path=args.log,
+        lenient=args.lenient,
+        warm=args.warm,
+        err=err,
+    )
+    emit = out.write
+    for speaker, dsl_line, payload, raw in transcript:
+        emit(f"{speaker}: {dsl_line}\n")
+        emit(json.dumps(payload, sort_keys=True) + "\n")
+        if args.raw_json and raw is not None:
+            emit(f"raw: {raw}\n")
+    return 0
 
-        if args.command == "relay":
-            client = OllamaClient(timeout=args.timeout, keep_alive=args.keep_alive)
-            if args.probe:
-                ok, report = run_probe(client=client, models=[args.a_model, args.b_model])
-                print("probe report:")
-                for entry in report:
-                    if entry["kind"] == "tags":
-                        status = "ok" if entry["ok"] else "fail"
-                        print(
-                            f"- /api/tags: {status} http={entry.get('http_status')} elapsed_ms={entry.get('elapsed_ms')}"
-                        )
-                        if entry.get("reason"):
-                            print(f"  reason: {entry['reason']}")
-                    else:
-                        status = "ok" if entry["ok"] else "fail"
-                        print(
-                            f"- model {entry['model']}: {status} http={entry.get('http_status')} elapsed_ms={entry.get('elapsed_ms')}"
-                        )
-                        if entry.get("reason"):
-                            print(f"  reason: {entry['reason']}")
-                return 0 if ok else 2
-
-            transcript = run_relay(
-                client=client,
-                a_model=args.a_model,
-                b_model=args.b_model,
-                turns=args.turns,
-                seed=args.seed,
-                system_a=args.system_a,
-                system_b=args.system_b,
-                start=args.start,
-                strict=args.strict,
-                structured=args.structured,
-                use_schema=args.schema if args.structured else False,
-                allow_unknown_op=args.allow_unknown_op,
-                allow_unknown_target=args.allow_unknown_target,
-                fallback_enabled=not args.no_fallback,
-                no_repeat=args.no_repeat,
-                raw_json=args.raw_json,
-                log_path=args.log,
-                lenient=args.lenient,
-                warm=args.warm,
-            )
-            for speaker, dsl_line, payload, raw in transcript:
-                print(f"{speaker}: {dsl_line}")
-                print(json.dumps(payload, sort_keys=True))
-                if args.raw_json and raw is not None:
-                    print(f"raw: {raw}")
-            return 0
-
-        parser.error("unknown command")
+
+# Built once at import; argparse parsers are reusable across parse_args calls.
+_PARSER = build_parser()
+
+
+def run(argv: list[str]) -> tuple[int, str, str]:
+    """Run the CLI and return ``(exit_code, stdout, stderr)`` as strings.
+
+    Output is written to per-call buffers handed to the parser and handlers,
+    including usage errors, ``--help``/``--version`` and runner/relay/adapter
+    messages; ``sys.stdout``/``sys.stderr`` are never replaced.
+    """
+    out = io.StringIO()
+    err = io.StringIO()
+    try:
+        code = main(argv, out=out, err=err)
+    except SystemExit as exc:
+        code = _exit_code(exc)
+    return code, out.getvalue(), err.getvalue()
+
+
+def _exit_code(exc: SystemExit) -> int:
+    if exc.code is None:
+        return 0
+    return exc.code if isinstance(exc.code, int) else 1
+
+
+def main(argv: list[str] | None = None, *, out: TextIO | None = None, err: TextIO | None = None) -> int:
+    """Run the CLI and return its exit code; all output goes to ``out``/``err``.
+
+    Argument errors, ``--help`` and ``--version`` still raise ``SystemExit``
+    after writing to the given streams.
+    """
+    out = sys.stdout if out is None else out
+    err = sys.stderr if err is None else err
+    token = _PARSER_STREAMS.set((out, err))
+    try:
+        args = _PARSER.parse_args(argv)
+    finally:
+        _PARSER_STREAMS.reset(token)
+    return _dispatch(args, out=out, err=err)
+
+
+def _dispatch(args: argparse.Namespace, *, out: TextIO, err: TextIO) -> int:
+    try:
+        return args.func(args, out=out, err=err)
     except DSLParseError as exc:
-        print(f"error: {exc}", file=sys.stderr)
-        if args.command == "validate":
-            _print_validation_suggestions(validate_text or "", exc, lenient=args.lenient)
+        print(f"error: {exc}", file=err)
         return 2
     except (ValueError, json.JSONDecodeError, OSError) as exc:
-        print(f"error: {exc}", file=sys.stderr)
+        print(f"error: {exc}", file=err)
         return 2
     except (ProfileError, RunError) as exc:
-        print(f"error: {exc}", file=sys.stderr)
+        print(f"error: {exc}", file=err)
         return 2
     except RelayError as exc:
-        print(f"error: {exc}", file=sys.stderr)
+        print(f"error: {exc}", file=err)
         if args.command == "relay":
             print(
                 "hint: relay failed early. Try: choom relay --probe --a-model X --b-model Y",
-                file=sys.stderr,
+                file=err,
             )
         return 2
 
-    return 1
-
 
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -3,21 +3,38 @@
 from __future__ import annotations
 
 import re
-from dataclasses import dataclass
-from typing import Any
+import sys
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Any, Iterable
 
-from .registry import OP_ALIASES, normalize_op
+from .registry import CANONICAL_OPS, CANONICAL_TARGETS, OP_ALIASES, normalize_op
 
 ALIAS_TO_CANON = dict(OP_ALIASES)
 
 HEADER_RE = re.compile(r"^(?P<target>[A-Za-z_][A-Za-z0-9_-]*)(?:\[(?P<count>[^\]]+)\])?$")
+# One whitespace-delimited token: bare chars and "quoted" runs (with backslash
+# escapes) in any mix. A quote still open at end of input lands in ``open``.
+TOKEN_RE = re.compile(
+    r'(?:[^\s"]|"(?:\\.|[^"\\])*"|(?P<open>"(?:\\.|[^"\\])*\\?\Z))+',
+    re.DOTALL,
+)
+# Standalone trailing tokens dropped in lenient mode ("ping txt ." -> "ping txt").
+LENIENT_TRAILING_TOKENS = frozenset({".", ",", ";"})
+# Values containing any of these must be quoted on output.
+NEEDS_QUOTES_RE = re.compile(r'[\s"=]')
+_BOOL_WORDS = {"true": True, "false": False}
+_BOOL_FIRST_CHARS = frozenset("tTfF")
+PARSE_CACHE_SIZE = 4096
+# Longer lines (e.g. inline script text) skip the caches so they cannot evict the short common ones.
+CACHEABLE_LINE_LENGTH = 1024
 
 
 class DSLParseError(ValueError):
     """Raised when a DSL line cannot be parsed."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ParsedCommand:
     op: str
     target: str
@@ -38,10 +55,45 @@ def canonicalize_op(op: str) -> str:
 
 
 def parse_dsl(line: str, *, lenient: bool = False) -> ParsedCommand:
+    cached = _parse_line(line, lenient)
+    # Callers own the returned params dict; never hand out the cached one.
+    return replace(cached, params=dict(cached.params))
+
+
+def parse_dsl_json(line: str, *, lenient: bool = False) -> dict[str, Any]:
+    """Parse one line straight to its JSON dict; same result as ``parse_dsl(...).to_json_dict()``."""
+    # to_json_dict() already copies params, so the cached command is not copied first.
+    return _parse_line(line, lenient).to_json_dict()
+
+
+def parse_many(
+    lines: Iterable[str], *, lenient: bool = False
+) -> list[ParsedCommand | DSLParseError]:
+    """Parse many lines in one pass; failures are returned in place, not raised."""
+    parse = _parse_line
+    results: list[ParsedCommand | DSLParseError] = []
+    append = results.append
+    for line in lines:
+        try:
+            cached = parse(line, lenient)
+        except DSLParseError as exc:
+            append(exc)
+            continue
+        append(replace(cached, params=dict(cached.params)))
+    return results
+
+
+def _parse_line(line: str, lenient: bool) -> ParsedCommand:
+    if len(line) <= CACHEABLE_LINE_LENGTH:
+        return _parse_dsl_cached(line, lenient)
+    return _parse_dsl_impl(line, lenient)
+
+
+def _parse_dsl_impl(line: str, lenient: bool) -> ParsedCommand:
     token_rows = _tokenize(line)
     tokens = [token for token, _ in token_rows]
-    if lenient:
-        tokens = _strip_trailing_punctuation_token(tokens)
+    if lenient and tokens and tokens[-1] in LENIENT_TRAILING_TOKENS:
+        tokens.pop()
     if len(tokens) < 2:
         raise DSLParseError("invalid header: expected '<op> <target>[count] ...'")
 
@@ -63,40 +115,71 @@ def parse_dsl(line: str, *, lenient: bool = False) -> ParsedCommand:
             )
         params[key] = _coerce_value(raw_value)
 
-    return ParsedCommand(op=canonicalize_op(op), target=target, count=count, params=params)
+    # Interned op/target make downstream registry lookups and == checks cheap.
+    op = sys.intern(ALIAS_TO_CANON.get(op, op))
+    return ParsedCommand(op=op, target=sys.intern(target), count=count, params=params)
+
+
+_parse_dsl_cached = lru_cache(maxsize=PARSE_CACHE_SIZE)(_parse_dsl_impl)
 
 
 def serialize_dsl(command: dict[str, Any] | ParsedCommand) -> str:
     if isinstance(command, ParsedCommand):
-        payload = command.to_json_dict()
+        # Read fields directly; to_json_dict() would copy params for nothing.
+        raw_op, raw_target, raw_count, params = command.op, command.target, command.count, command.params
     else:
-        payload = command
+        raw_op = command["op"]
+        raw_target = command["target"]
+        raw_count = command.get("count", 1)
+        params = command.get("params", {})
 
-    op = canonicalize_op(str(payload["op"]))
-    target = str(payload["target"])
-    count = int(payload.get("count", 1))
+    op = canonicalize_op(str(raw_op))
+    target = str(raw_target)
+    count = int(raw_count)
     if count < 1:
         raise DSLParseError(f"bad count: expected >= 1, got {count}")
 
-    params = payload.get("params", {})
     if not isinstance(params, dict):
         raise DSLParseError("malformed params: expected object/dict")
 
     parts = [op, target if count == 1 else f"{target}[{count}]"]
-    for key in sorted(params):
-        parts.append(f"{key}={_serialize_value(params[key])}")
+    parts.extend([f"{key}={_serialize_value(params[key])}" for key in sorted(params)])
     return " ".join(parts)
 
 
 def format_dsl(line: str, *, lenient: bool = False) -> str:
     """Return canonical single-line DSL formatting for input."""
-    return serialize_dsl(parse_dsl(line, lenient=lenient))
+    if len(line) <= CACHEABLE_LINE_LENGTH:
+        return _format_dsl_cached(line, lenient)
+    return serialize_dsl(_parse_dsl_impl(line, lenient))
+
+
+def parse_validate_serialize(
+    line: str, *, lenient: bool = False
+) -> tuple[ParsedCommand, str, bool, bool]:
+    """Parse once and return (command, canonical DSL, op is known, target is known)."""
+    cached = _parse_line(line, lenient)
+    if len(line) <= CACHEABLE_LINE_LENGTH:
+        canonical = _format_dsl_cached(line, lenient)
+    else:
+        canonical = serialize_dsl(cached)
+    # As in parse_dsl, the caller gets its own params dict, not the cache entry's.
+    parsed = replace(cached, params=dict(cached.params))
+    return parsed, canonical, parsed.op in CANONICAL_OPS, parsed.target in CANONICAL_TARGETS
 
 
-def _strip_trailing_punctuation_token(tokens: list[str]) -> list[str]:
-    if tokens and tokens[-1] in {".", ",", ";"}:
-        return tokens[:-1]
-    return tokens
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _format_dsl_cached(line: str, lenient: bool) -> str:
+    return serialize_dsl(_parse_dsl_cached(line, lenient))
+
+
+def _clear_caches() -> None:
+    _parse_dsl_cached.cache_clear()
+    _format_dsl_cached.cache_clear()
+
+
+parse_dsl.cache_clear = _clear_caches  # type: ignore[attr-defined]
+format_dsl.cache_clear = _clear_caches  # type: ignore[attr-defined]
 
 
 def _parse_target_count(token: str) -> tuple[str, int]:
@@ -123,91 +206,71 @@ def _tokenize(line: str) -> list[tuple[str, int]]:
         raise DSLParseError("invalid header: empty input")
 
     tokens: list[tuple[str, int]] = []
-    current: list[str] = []
-    current_start = 0
-    in_quote = False
-    escape = False
-
-    for i, ch in enumerate(line):
-        if in_quote:
-            current.append(ch)
-            if escape:
-                escape = False
-            elif ch == "\\":
-                escape = True
-            elif ch == '"':
-                in_quote = False
-            continue
-
-        if ch.isspace():
-            if current:
-                tokens.append(("".join(current), current_start))
-                current = []
-            continue
-
-        if not current:
-            current_start = i
-        current.append(ch)
-        if ch == '"':
-            in_quote = True
-
-    if in_quote:
-        token = "".join(current)
-        raise DSLParseError(
-            f"unterminated quote: missing closing '\"' in token '{token}' at char {current_start}"
-        )
-
-    if current:
-        tokens.append(("".join(current), current_start))
+    for match in TOKEN_RE.finditer(line):
+        token = match.group(0)
+        if match.group("open") is not None:
+            raise DSLParseError(
+                f"unterminated quote: missing closing '\"' in token '{token}' at char {match.start()}"
+            )
+        tokens.append((token, match.start()))
 
     return tokens
 
 
 def _coerce_value(raw: str) -> Any:
-    if len(raw) >= 2 and raw[0] == '"' and raw[-1] == '"':
+    # Classify by first char and str predicates; no regex or exceptions per value.
+    first = raw[:1]
+    if first == '"' and len(raw) >= 2 and raw[-1] == '"':
         inner = raw[1:-1]
         return _unescape_quoted(inner)
 
-    lower = raw.lower()
-    if lower == "true":
-        return True
-    if lower == "false":
-        return False
+    if first in _BOOL_FIRST_CHARS:
+        flag = _BOOL_WORDS.get(raw.lower())
+        if flag is not None:
+            return flag
+        return raw
 
-    if re.fullmatch(r"-?[0-9]+", raw):
+    digits = raw[1:] if first == "-" else raw
+    if not digits.isascii():
+        return raw
+    if digits.isdigit():
         return int(raw)
 
-    if re.fullmatch(r"-?[0-9]+\.[0-9]+", raw):
+    whole, dot, fraction = digits.partition(".")
+    if dot and whole.isdigit() and fraction.isdigit():
         return float(raw)
 
     return raw
 
 
 def _unescape_quoted(text: str) -> str:
-    result: list[str] = []
-    i = 0
-    while i < len(text):
-        ch = text[i]
-        if ch == "\\" and i + 1 < len(text):
-            nxt = text[i + 1]
-            if nxt in {'"', "\\"}:
-                result.append(nxt)
-                i += 2
-                continue
-        result.append(ch)
-        i += 1
-    return "".join(result)
+    if "\\" not in text:
+        return text
+    # Copy the runs between escapes as slices; only \" and \\ are escapes.
+    parts: list[str] = []
+    start = 0
+    i = text.find("\\")
+    while i != -1:
+        if text[i + 1 : i + 2] in ('"', "\\"):
+            parts.append(text[start:i])
+            start = i + 1
+            i = text.find("\\", i + 2)
+        else:
+            i = text.find("\\", i + 1)
+    parts.append(text[start:])
+    return "".join(parts)
 
 
 def _serialize_value(value: Any) -> str:
-    if isinstance(value, bool):
+    if isinstance(value, str):
+        text = value
+    elif isinstance(value, bool):
         return "true" if value else "false"
-    if isinstance(value, int) and not isinstance(value, bool):
-        return str(value)
-    if isinstance(value, float):
+    elif isinstance(value, (int, float)):
         return str(value)
+    else:
+        text = str(value)
 
-    text = str(value)
     if _needs_quotes(text):
         escaped = text.replace("\\", "\\\\").replace('"', '\\"')
         return f'"{escaped}"'
@@ -215,9 +278,4 @@ def _serialize_value(value: Any) -> str:
 
 
 def _needs_quotes(text: str) -> bool:
-    if text == "":
-        return True
-    for ch in text:
-        if ch.isspace() or ch in {'"', '='}:
-            return True
-    return False
+    return text == "" or NEEDS_QUOTES_RE.search(text) is not None
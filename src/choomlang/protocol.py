@@ -2,34 +2,32 @@
 
 from __future__ import annotations
 
-from .dsl import DSLParseError, format_dsl, parse_dsl
+import mmap
+import re
+from pathlib import Path
+
+from .dsl import DSLParseError, format_dsl, parse_dsl, parse_dsl_json
 from .registry import CANONICAL_OPS, CANONICAL_TARGETS
 
 KNOWN_OPS = ["gen", "classify", "summarize", "plan", "healthcheck", "toolcall", "forward"]
 KNOWN_TARGETS = ["img", "txt", "aud", "vid", "vec", "tool", "script"]
 
+# Longest prefix made of non-'#' characters and closed "quoted" runs; the
+# character right after it is either an unquoted '#' or an unclosed quote.
+_CODE_PREFIX_RE = re.compile(r'(?:[^"#]|"(?:\\.|[^"\\])*")*', re.DOTALL)
 
-def strip_inline_comment(line: str) -> str:
-    """Strip comments that start with unquoted '#'."""
-    in_quote = False
-    escape = False
-    for i, ch in enumerate(line):
-        if in_quote:
-            if escape:
-                escape = False
-            elif ch == "\\":
-                escape = True
-            elif ch == '"':
-                in_quote = False
-            continue
-
-        if ch == '"':
-            in_quote = True
-            continue
+_MMAP_THRESHOLD = 64 * 1024
+# Line boundaries recognised by str.splitlines() other than "\n" / "\r\n".
+_RARE_LINE_BREAK_RE = re.compile(rb"\r(?!\n)|[\x0b\x0c\x1c-\x1e]|\xc2\x85|\xe2\x80[\xa8\xa9]")
 
-        if ch == "#":
-            return line[:i].rstrip()
 
+def strip_inline_comment(line: str) -> str:
+    """Strip comments that start with unquoted '#'."""
+    if "#" not in line:
+        return line.rstrip()
+    end = _CODE_PREFIX_RE.match(line).end()
+    if end < len(line) and line[end] == "#":
+        return line[:end].rstrip()
     return line.rstrip()
 
 
@@ -37,16 +35,50 @@ def iter_script_lines(text: str) -> list[tuple[int, str]]:
     """Return parseable script lines as (line_number, dsl_text)."""
     rows: list[tuple[int, str]] = []
     for line_number, raw in enumerate(text.splitlines(), start=1):
-        stripped = raw.strip()
-        if not stripped or stripped.startswith("#"):
-            continue
-        without_comment = strip_inline_comment(raw).strip()
-        if not without_comment:
-            continue
-        rows.append((line_number, without_comment))
+        line = _script_line(raw)
+        if line:
+            rows.append((line_number, line))
     return rows
 
 
+def read_script_lines(path: str | Path) -> list[tuple[int, str]]:
+    """Read a script file and return parseable lines as (line_number, dsl_text).
+
+    Large files are scanned line by line through ``mmap``. Every line is
+    decoded, so invalid UTF-8 raises at any file size.
+    """
+    path = Path(path)
+    if path.stat().st_size < _MMAP_THRESHOLD:
+        return iter_script_lines(path.read_text(encoding="utf-8"))
+
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if _RARE_LINE_BREAK_RE.search(mm):
+            return iter_script_lines(mm[:].decode("utf-8"))
+
+        rows: list[tuple[int, str]] = []
+        size = len(mm)
+        start = 0
+        line_number = 0
+        while start < size:
+            end = mm.find(b"\n", start)
+            if end == -1:
+                end = size
+            line_number += 1
+            # Blank and comment lines are decoded too, so bad bytes there are not skipped.
+            line = _script_line(mm[start:end].decode("utf-8"))
+            start = end + 1
+            if line:
+                rows.append((line_number, line))
+        return rows
+
+
+def _script_line(raw: str) -> str | None:
+    stripped = raw.strip()
+    if not stripped or stripped.startswith("#"):
+        return None
+    return strip_inline_comment(raw).strip() or None
+
+
 def build_guard_prompt(error: str | None = None, previous: str | None = None) -> str:
     base = (
         "Reply with exactly one valid ChoomLang DSL line and no extra text. "
@@ -66,21 +98,24 @@ def build_guard_prompt(error: str | None = None, previous: str | None = None) ->
     return " ".join(parts)
 
 
-def build_contract_prompt(mode: str = "dsl") -> str:
-    """Build deterministic protocol contract text for model system prompts."""
-    if mode == "dsl":
-        return (
-            "Reply with exactly one valid ChoomLang DSL line and no extra text. "
-            "Grammar: <op> <target>[count] key=value ... "
-            "Bans: no trailing punctuation, no standalone symbols, no JSON, one line only. "
-            "Examples: ping txt; gen txt prompt=\"hello\"; "
-            "classify txt sentiment=polarity; toolcall tool[1] name=search query=\"cats\"."
-        )
+_CONTRACTS = {
+    "dsl": (
+        "Reply with exactly one valid ChoomLang DSL line and no extra text. "
+        "Grammar: <op> <target>[count] key=value ... "
+        "Bans: no trailing punctuation, no standalone symbols, no JSON, one line only. "
+        "Examples: ping txt; gen txt prompt=\"hello\"; "
+        "classify txt sentiment=polarity; toolcall tool[1] name=search query=\"cats\"."
+    ),
+    "structured": "Return JSON only. Match the requested schema exactly.",
+}
 
-    if mode == "structured":
-        return "Return JSON only. Match the requested schema exactly."
 
-    raise ValueError("mode must be 'dsl' or 'structured'")
+def build_contract_prompt(mode: str = "dsl") -> str:
+    """Return deterministic protocol contract text for model system prompts."""
+    try:
+        return _CONTRACTS[mode]
+    except KeyError:
+        raise ValueError("mode must be 'dsl' or 'structured'") from None
 
 
 def canonical_json_schema(*, mode: str = "strict") -> dict[str, object]:
@@ -156,18 +191,27 @@ def parse_script_text(text: str) -> list[dict[str, object]]:
     parsed_rows: list[dict[str, object]] = []
     for line_number, line in iter_script_lines(text):
         try:
-            parsed_rows.append(parse_dsl(line).to_json_dict())
+            parsed_rows.append(parse_dsl_json(line))
         except DSLParseError as exc:
             raise DSLParseError(f"line {line_number}: {exc}") from exc
     return parsed_rows
 
 
+def validate_script_text(text: str) -> None:
+    """Raise DSLParseError for the first invalid script line without building payloads."""
+    for line_number, line in iter_script_lines(text):
+        try:
+            parse_dsl(line)
+        except DSLParseError as exc:
+            raise DSLParseError(f"line {line_number}: {exc}") from exc
+
+
 def script_to_jsonl(text: str, *, fail_fast: bool = True) -> tuple[list[str], list[str]]:
     outputs: list[str] = []
     errors: list[str] = []
     for line_number, line in iter_script_lines(text):
         try:
-            payload = parse_dsl(line).to_json_dict()
+            payload = parse_dsl_json(line)
         except DSLParseError as exc:
             errors.append(f"line {line_number}: {exc}")
             if fail_fast:
@@ -2,18 +2,25 @@
 
 from __future__ import annotations
 
+import sys
 from typing import Any
 
-CANONICAL_OPS = {"gen", "classify", "summarize", "plan", "healthcheck", "toolcall", "forward"}
-CANONICAL_TARGETS = {"img", "txt", "aud", "vid", "vec", "tool", "script"}
+# Interned so parsed ops/targets (also interned) compare by identity on lookup.
+CANONICAL_OPS = frozenset(
+    map(sys.intern, ("gen", "classify", "summarize", "plan", "healthcheck", "toolcall", "forward"))
+)
+CANONICAL_TARGETS = frozenset(map(sys.intern, ("img", "txt", "aud", "vid", "vec", "tool", "script")))
 OP_ALIASES = {
-    "jack": "gen",
-    "scan": "classify",
-    "ghost": "summarize",
-    "forge": "plan",
-    "ping": "healthcheck",
-    "call": "toolcall",
-    "relay": "forward",
+    sys.intern(alias): sys.intern(canon)
+    for alias, canon in {
+        "jack": "gen",
+        "scan": "classify",
+        "ghost": "summarize",
+        "forge": "plan",
+        "ping": "healthcheck",
+        "call": "toolcall",
+        "relay": "forward",
+    }.items()
 }
 
 
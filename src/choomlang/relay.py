@@ -4,20 +4,29 @@ import json
 import statistics
 import sys
 from difflib import get_close_matches
-from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from time import perf_counter
-from typing import Any, Callable, Literal
+from time import gmtime, perf_counter_ns, strftime, time_ns
+from typing import Any, Callable, Literal, TextIO
 from urllib import error, request
 
-from .dsl import DSLParseError
+from .dsl import DSLParseError, parse_dsl_json
 from .protocol import build_contract_prompt, build_guard_prompt, canonical_json_schema, parse_script_text
 from .registry import CANONICAL_OPS, CANONICAL_TARGETS, normalize_op, validate_payload
 from .translate import json_to_dsl
 
+# Prebuilt encoders: json.dumps() with non-default options constructs a new
+# JSONEncoder on every call.
+_encode_sorted = json.JSONEncoder(sort_keys=True).encode
+_encode_compact = json.JSONEncoder(sort_keys=True, separators=(",", ":")).encode
+
 OLLAMA_URL = "http://localhost:11434"
 MAX_MESSAGE_CHARS = 4000
 PING_PAYLOAD = {"op": "healthcheck", "target": "txt", "count": 1, "params": {}}
+_PING_CONTENT = (
+    "Return JSON only with no extra text. "
+    f"Reply exactly with: {json.dumps(PING_PAYLOAD, sort_keys=True)}"
+)
 RequestMode = Literal["dsl", "structured-schema", "structured-json", "fallback-dsl"]
 
 
@@ -37,7 +46,12 @@ def _extract_model_names(tags_payload: dict[str, Any]) -> list[str]:
 def suggest_model_names(name: str, available: list[str], *, limit: int = 3) -> list[str]:
     if not available:
         return []
-    return get_close_matches(name, available, n=limit, cutoff=0.4)
+    return list(_suggest_model_names_cached(name, tuple(available), limit))
+
+
+@lru_cache(maxsize=128)
+def _suggest_model_names_cached(name: str, available: tuple[str, ...], limit: int) -> tuple[str, ...]:
+    return tuple(get_close_matches(name, available, n=limit, cutoff=0.4))
 
 
 def _format_structured_failure(stage: str, error: RelayError) -> RelayError:
@@ -71,15 +85,14 @@ class RelayError(RuntimeError):
 
 
 def build_ping_messages() -> list[dict[str, str]]:
-    return [
-        {
-            "role": "user",
-            "content": (
-                "Return JSON only with no extra text. "
-                f"Reply exactly with: {json.dumps(PING_PAYLOAD, sort_keys=True)}"
-            ),
-        }
-    ]
+    # Fresh list/dict per call so callers may append; only the content is shared.
+    return [{"role": "user", "content": _PING_CONTENT}]
+
+
+@lru_cache(maxsize=2)
+def _response_schema(mode: str) -> dict[str, object]:
+    """Schema sent as the chat ``format``; built once per mode since it is only serialized."""
+    return canonical_json_schema(mode=mode)
 
 
 def build_chat_request(
@@ -125,7 +138,7 @@ def call_ollama_chat(
         raise RelayError(
             "Ollama returned an unexpected /api/chat response shape",
             http_status=status,
-            raw_response=json.dumps(data, sort_keys=True),
+            raw_response=_encode_sorted(data),
         )
     return content, elapsed_ms, status
 
@@ -146,7 +159,7 @@ class OllamaClient:
 
     def get_tags(self, *, timeout: float | None = None) -> tuple[dict[str, Any], int, int]:
         req = request.Request(f"{self.base_url}/api/tags", method="GET")
-        started = perf_counter()
+        started = perf_counter_ns()
         use_timeout = self.timeout if timeout is None else timeout
         try:
             with request.urlopen(req, timeout=use_timeout) as resp:
@@ -187,7 +200,7 @@ class OllamaClient:
             raise RelayError("Ollama returned non-JSON output", stage="probe-tags") from exc
         if not isinstance(data, dict):
             raise RelayError("Ollama returned a non-object JSON payload", stage="probe-tags")
-        return data, int((perf_counter() - started) * 1000), status
+        return data, (perf_counter_ns() - started) // 1_000_000, status
 
     def chat(
         self,
@@ -250,14 +263,14 @@ class OllamaClient:
     def _post_json(
         self, path: str, payload: dict[str, Any], *, timeout: float | None = None
     ) -> tuple[dict[str, Any], int, int]:
-        body = json.dumps(payload, sort_keys=True).encode("utf-8")
+        body = _encode_sorted(payload).encode("utf-8")
         req = request.Request(
             f"{self.base_url}{path}",
             data=body,
             headers={"Content-Type": "application/json"},
             method="POST",
         )
-        started = perf_counter()
+        started = perf_counter_ns()
         use_timeout = self.timeout if timeout is None else timeout
         try:
             with request.urlopen(req, timeout=use_timeout) as resp:
@@ -294,7 +307,7 @@ class OllamaClient:
             raise RelayError("Ollama returned non-JSON output", raw_response=raw) from exc
         if not isinstance(data, dict):
             raise RelayError("Ollama returned a non-object JSON payload", raw_response=raw)
-        return data, int((perf_counter() - started) * 1000), status
+        return data, (perf_counter_ns() - started) // 1_000_000, status
 
 
 def run_probe(*, client: OllamaClient, models: list[str]) -> tuple[bool, list[dict[str, Any]]]:
@@ -384,9 +397,7 @@ def strict_validate_with_retry(
 
 
 def dsl_to_json_with_options(message: str, *, lenient: bool) -> dict[str, Any]:
-    from .dsl import parse_dsl
-
-    return parse_dsl(message, lenient=lenient).to_json_dict()
+    return parse_dsl_json(message, lenient=lenient)
 
 
 def parse_structured_reply(
@@ -498,6 +509,24 @@ def decide_structured_recovery(
     return "fallback-dsl"
 
 
+_ts_second: tuple[int, str] = (-1, "")
+
+
+def _utc_isoformat_now() -> str:
+    """Same text as ``datetime.now(timezone.utc).isoformat()``, reusing the formatted second."""
+    global _ts_second
+    second, nanos = divmod(time_ns(), 1_000_000_000)
+    # Read the shared pair once; another thread may replace it for a different second.
+    cached = _ts_second
+    if second != cached[0]:
+        cached = _ts_second = (second, strftime("%Y-%m-%dT%H:%M:%S", gmtime(second)))
+    prefix = cached[1]
+    micros = nanos // 1000
+    if micros:
+        return f"{prefix}.{micros:06d}+00:00"
+    return f"{prefix}+00:00"
+
+
 def build_transcript_record(
     *,
     side: str,
@@ -521,7 +550,7 @@ def build_transcript_record(
     repeat_prevented: int = 0,
 ) -> dict[str, Any]:
     return {
-        "ts": datetime.now(timezone.utc).isoformat(),
+        "ts": _utc_isoformat_now(),
         "request_id": request_id,
         "side": side,
         "model": model,
@@ -573,21 +602,22 @@ def summarize_transcript(records: list[dict[str, Any]]) -> dict[str, Any]:
     }
 
 
-def print_relay_summary(summary: dict[str, Any], *, log_path: str | None) -> None:
+def print_relay_summary(summary: dict[str, Any], *, log_path: str | None, err: TextIO | None = None) -> None:
+    err = sys.stderr if err is None else err
     print(
         "relay summary: "
         f"turns={summary['total_turns']} retries={summary['retries']} "
         f"repeats_prevented={summary['repeats_prevented']} "
-        f"fallbacks={json.dumps(summary['fallbacks_by_stage'], sort_keys=True)}",
-        file=sys.stderr,
+        f"fallbacks={_encode_sorted(summary['fallbacks_by_stage'])}",
+        file=err,
     )
     for stage, values in summary["elapsed_ms_by_stage"].items():
         print(
             f"  {stage}: avg={values['avg_ms']}ms median={values['median_ms']}ms",
-            file=sys.stderr,
+            file=err,
         )
     if log_path:
-        print(f"  transcript: {log_path}", file=sys.stderr)
+        print(f"  transcript: {log_path}", file=err)
 
 
 def append_transcript(path: str | None, record: dict[str, Any]) -> None:
@@ -595,7 +625,7 @@ def append_transcript(path: str | None, record: dict[str, Any]) -> None:
         return
     target = Path(path)
     with target.open("a", encoding="utf-8", buffering=1) as fh:
-        fh.write(json.dumps(record, sort_keys=True, separators=(",", ":")) + "\n")
+        fh.write(_encode_compact(record) + "\n")
         fh.flush()
 
 
@@ -621,9 +651,12 @@ def run_relay(
     lenient: bool = False,
     warm: bool = False,
     no_repeat: bool = True,
+    err: TextIO | None = None,
 ) -> list[tuple[str, str, dict[str, Any], str | None]]:
+    """Relay messages between two models; warnings and the summary go to ``err`` (default stderr)."""
     if turns < 1:
         raise RelayError("turns must be >= 1")
+    err = sys.stderr if err is None else err
 
     if warm:
         warm_models(client=client, models=[a_model, b_model])
@@ -673,9 +706,10 @@ def run_relay(
                     add_contract=use_contract_in_structured,
                     previous_payload=current_json,
                     no_repeat=no_repeat,
+                    err=err,
                 )
                 mode = "structured"
-                next_incoming = json.dumps(response_json, sort_keys=True)
+                next_incoming = _encode_sorted(response_json)
             else:
                 response_raw, response, response_json, elapsed_ms, http_status, retry_value = _dsl_model_step(
                     client=client,
@@ -723,7 +757,7 @@ def run_relay(
             current = next_incoming if structured else response
             current_json = response_json
 
-    print_relay_summary(summarize_transcript(records), log_path=log_path)
+    print_relay_summary(summarize_transcript(records), log_path=log_path, err=err)
     return transcript
 
 
@@ -743,11 +777,12 @@ def _structured_model_step(
     add_contract: bool,
     previous_payload: dict[str, Any],
     no_repeat: bool,
+    err: TextIO,
 ) -> tuple[str, str, dict[str, Any], int, RequestMode, int | None, int, str | None, int]:
     contract = build_contract_prompt("structured") if add_contract else ""
     prompt = (
         "Reply with exactly one canonical ChoomLang JSON object and no extra text.\n"
-        f"{contract}\nIncoming JSON: {json.dumps(incoming_json, sort_keys=True)}"
+        f"{contract}\nIncoming JSON: {_encode_sorted(incoming_json)}"
     ).strip()
     if len(prompt) > MAX_MESSAGE_CHARS:
         raise RelayError("incoming message too large to relay")
@@ -784,7 +819,7 @@ def _structured_model_step(
                 "role": "user",
                 "content": (
                     "Previous canonical payload: "
-                    f"{json.dumps(previous_payload, sort_keys=True)}\n"
+                    f"{_encode_sorted(previous_payload)}\n"
                     "Do not repeat the previous line; advance the workflow."
                 ),
             },
@@ -825,7 +860,7 @@ def _structured_model_step(
         schema_mode = "strict" if strict else "permissive"
         try:
             raw_schema, elapsed_schema, status_schema = _chat_once(
-                client, model, working_history, seed=seed, response_format=canonical_json_schema(mode=schema_mode)
+                client, model, working_history, seed=seed, response_format=_response_schema(schema_mode)
             )
             payload, dsl = parse_structured_reply(
                 raw_schema,
@@ -841,7 +876,7 @@ def _structured_model_step(
                 request_mode="structured-schema",
                 retry_value=0,
                 fallback_reason=None,
-                response_format=canonical_json_schema(mode=schema_mode),
+                response_format=_response_schema(schema_mode),
             )
         except RelayError as schema_err:
             reason = f"schema-failed:{schema_err}"
@@ -860,7 +895,7 @@ def _structured_model_step(
                 ) from schema_err
             print(
                 f"warning: structured schema stage failed ({schema_err}); retrying with format=json",
-                file=sys.stderr,
+                file=err,
             )
             try:
                 raw_json, elapsed_json, status_json = _chat_once(
@@ -893,7 +928,7 @@ def _structured_model_step(
                         raw_response=wrapped.raw_response,
                         stage=wrapped.stage,
                     ) from json_err
-                print("warning: structured json stage failed; falling back to DSL guard mode", file=sys.stderr)
+                print("warning: structured json stage failed; falling back to DSL guard mode", file=err)
                 raw_dsl, dsl_line, payload, elapsed_dsl, http_status, retry_count = _dsl_model_step(
                     client=client,
                     model=model,
@@ -916,7 +951,7 @@ def _structured_model_step(
                     0,
                 )
 
-    raw, elapsed, status = _chat_once(client, model, working_history, seed=seed, response_format=canonical_json_schema(mode="permissive"))
+    raw, elapsed, status = _chat_once(client, model, working_history, seed=seed, response_format=_response_schema("permissive"))
     payload, dsl = parse_structured_reply(
         raw,
         strict_ops=not allow_unknown_op,
@@ -931,7 +966,7 @@ def _structured_model_step(
         request_mode="structured-json",
         retry_value=0,
         fallback_reason=None,
-        response_format=canonical_json_schema(mode="permissive"),
+        response_format=_response_schema("permissive"),
     )
 
 
@@ -949,7 +984,7 @@ def _dsl_model_step(
     prompt = (
         "Reply with exactly one ChoomLang DSL line.\n"
         f"Incoming DSL: {incoming_dsl}\n"
-        f"Incoming JSON: {json.dumps(incoming_json, sort_keys=True)}"
+        f"Incoming JSON: {_encode_sorted(incoming_json)}"
     )
     if len(prompt) > MAX_MESSAGE_CHARS:
         raise RelayError("incoming message too large to relay")
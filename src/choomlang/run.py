@@ -3,13 +3,16 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Any
 
 from .adapters import run_adapter
-from .dsl import parse_dsl
+from .dsl import DSLParseError, parse_dsl
 from .errors import RunError
+from .llm import OllamaLLMClient
+from .protocol import iter_script_lines
 
 
-def run_toolcall(dsl_line: str, *, out_dir: str = "out", dry_run: bool = False) -> str:
+def _toolcall_request(dsl_line: str) -> tuple[str, dict[str, Any]]:
     parsed = parse_dsl(dsl_line)
     if parsed.op != "toolcall" or parsed.target != "tool":
         raise RunError("choom run only supports canonical 'toolcall tool' commands")
@@ -19,7 +22,34 @@ def run_toolcall(dsl_line: str, *, out_dir: str = "out", dry_run: bool = False)
         raise RunError("toolcall requires param 'name' for adapter selection")
 
     params = {k: v for k, v in parsed.params.items() if k != "name"}
-    out_path = Path(out_dir)
+    return tool_name, params
+
+
+def run_toolcall(dsl_line: str, *, out_dir: str = "out", dry_run: bool = False) -> str:
+    tool_name, params = _toolcall_request(dsl_line)
 
     # TODO(v0.9+): add configurable external adapters with explicit allowlists.
-    return run_adapter(tool_name, params, out_path, dry_run)
+    return run_adapter(tool_name, params, Path(out_dir), dry_run)
+
+
+def run_toolcall_script(script: str, *, out_dir: str = "out", dry_run: bool = False) -> list[str]:
+    """Run every toolcall line in ``script`` in order and return the adapter results.
+
+    All lines are parsed and checked before any adapter runs, so a bad line
+    later in the script cannot leave earlier side effects behind.
+    """
+    requests: list[tuple[str, dict[str, Any]]] = []
+    for line_number, line in iter_script_lines(script):
+        try:
+            requests.append(_toolcall_request(line))
+        except DSLParseError as exc:
+            raise DSLParseError(f"line {line_number}: {exc}") from exc
+        except RunError as exc:
+            raise RunError(f"line {line_number}: {exc}") from exc
+
+    out_path = Path(out_dir)
+    llm_client = OllamaLLMClient()
+    return [
+        run_adapter(tool_name, params, out_path, dry_run, llm_client=llm_client)
+        for tool_name, params in requests
+    ]
@@ -8,20 +8,22 @@ import hashlib
 import time
 import sys
 from dataclasses import dataclass, field
-from pathlib import Path, PurePosixPath
-from typing import Any
+from pathlib import Path
+from typing import Any, TextIO
 
-from .llm import LLMClient
+from .llm import LLMClient, OllamaLLMClient
 
-from .dsl import DSLParseError, parse_dsl
+from .dsl import DSLParseError, parse_dsl_json
 from .adapters import run_adapter
 from .errors import RunError
-from .protocol import iter_script_lines
+from .protocol import read_script_lines
 
 _INTERPOLATION_RE = re.compile(r"@([A-Za-z_][A-Za-z0-9_-]*)")
+# Prebuilt so state/transcript writes don't construct a JSONEncoder per call.
+_encode_compact = json.JSONEncoder(sort_keys=True, separators=(",", ":")).encode
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class RunnerConfig:
     workdir: str | None = None
     dry_run: bool = False
@@ -66,11 +68,34 @@ class RunnerState:
         path.parent.mkdir(parents=True, exist_ok=True)
         tmp_path = path.with_suffix(path.suffix + ".tmp")
         tmp_path.write_text(
-            json.dumps(self.data, sort_keys=True, separators=(",", ":")),
+            _encode_compact(self.data),
             encoding="utf-8",
         )
         tmp_path.replace(path)
 
+    def replay_log(self, log_path: Path) -> bool:
+        """Apply the updates recorded in a state.jsonl log; return True if any were found."""
+        try:
+            raw = log_path.read_bytes()
+        except FileNotFoundError:
+            return False
+        for line in raw.splitlines():
+            if not line.strip():
+                continue
+            try:
+                update = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from an interrupted append; earlier updates still apply.
+                break
+            if isinstance(update, dict):
+                self.data.update(update)
+        return True
+
+    def compact(self, path: Path, log_path: Path) -> None:
+        """Fold the log into state.json; the log goes only after the snapshot is in place."""
+        self.save_atomic(path)
+        log_path.unlink(missing_ok=True)
+
     def set_last_successful_step(self, *, step: int | None, line_number: int | None, script: str) -> None:
         meta = self.data.get("_runner")
         if not isinstance(meta, dict):
@@ -81,7 +106,7 @@ class RunnerState:
         self.data["_runner"] = meta
 
 
-@dataclass
+@dataclass(slots=True)
 class StepResult:
     step: int
     dsl: str
@@ -94,7 +119,7 @@ class StepResult:
 
     def to_transcript_record(self) -> dict[str, Any]:
         return {
-            "ts": int(time.time() * 1000),
+            "ts": time.time_ns() // 1_000_000,
             "step": self.step,
             "dsl": self.dsl,
             "payload": self.payload,
@@ -120,8 +145,16 @@ def run_script(
     a1111_url: str | None = None,
     a1111_timeout: float | None = None,
     cancel_on_timeout: bool = False,
+    out: TextIO | None = None,
+    err: TextIO | None = None,
 ) -> list[str]:
-    """Execute a .choom script line-by-line with persistent state + transcript."""
+    """Execute a .choom script line-by-line with persistent state + transcript.
+
+    Progress notices go to ``err`` and adapter messages to ``out`` (default
+    stderr/stdout), whether or not ``config`` is given.
+    """
+    out = sys.stdout if out is None else out
+    err = sys.stderr if err is None else err
     cfg = config or RunnerConfig(
         workdir=workdir,
         dry_run=dry_run,
@@ -150,136 +183,162 @@ def run_script(
     run_dir = Path(cfg.workdir) if cfg.workdir else _default_run_dir(path)
     artifacts_dir = run_dir / "artifacts"
     state_path = run_dir / "state.json"
+    state_log_path = run_dir / "state.jsonl"
     transcript_path = run_dir / "transcript.jsonl"
+    progress_path = run_dir / "progress.json"
     run_dir.mkdir(parents=True, exist_ok=True)
     artifacts_dir.mkdir(parents=True, exist_ok=True)
 
+    script_id = str(path.resolve())
     state = RunnerState.load(state_path)
-    state.set_last_successful_step(step=None, line_number=None, script=str(path.resolve()))
-    state.save_atomic(state_path)
+    # A leftover log means an earlier run stopped before compacting; its updates are newer than state.json.
+    state.replay_log(state_log_path)
+    state.set_last_successful_step(step=None, line_number=None, script=script_id)
+    state.compact(state_path, state_log_path)
 
-    script_rows = iter_script_lines(path.read_text(encoding="utf-8"))
+    script_rows = read_script_lines(path)
     total_steps = len(script_rows)
-    start_idx = _determine_start_index(cfg.resume, transcript_path)
+    # None when progress.json is missing or stale; the transcript is then only
+    # scanned if the run actually resumes from it.
+    completed = _known_completed_steps(transcript_path, progress_path)
+    start_idx = _determine_start_index(cfg.resume, completed, transcript_path)
+    if completed is None and cfg.resume is True:
+        completed = start_idx
     if isinstance(cfg.resume, int) and not isinstance(cfg.resume, bool) and start_idx >= total_steps:
         raise RunError(f"--resume out of range: requested step {start_idx + 1} but script has {total_steps} step(s)")
     if cfg.resume:
         resume_step = min(start_idx + 1, total_steps + 1)
-        print(f"resume: step {resume_step} of {total_steps}", file=sys.stderr)
+        print(f"resume: step {resume_step} of {total_steps}", file=err)
     selected = script_rows[start_idx:]
     if cfg.max_steps is not None:
         selected = selected[: cfg.max_steps]
 
+    # One client for the whole run rather than a default built per adapter call.
+    llm_client = cfg.llm_client or OllamaLLMClient()
     results: list[str] = []
-    with transcript_path.open("a", encoding="utf-8") as transcript_file:
-        for step_index, (line_number, dsl_line) in enumerate(selected, start=start_idx + 1):
-            started = time.perf_counter()
-            payload: dict[str, Any] | None = None
-            try:
-                payload = parse_dsl(dsl_line).to_json_dict()
-                payload["params"] = _interpolate_params(payload["params"], state, cfg.dry_run)
-                if payload["params"].get("__skip__"):
-                    skip_message = str(payload["params"].pop("__skip__"))
+    state_log = None
+    try:
+        with transcript_path.open("a", encoding="utf-8") as transcript_file:
+            for step_index, (line_number, dsl_line) in enumerate(selected, start=start_idx + 1):
+                started = time.perf_counter_ns()
+                payload: dict[str, Any] | None = None
+                try:
+                    payload = parse_dsl_json(dsl_line)
+                    payload["params"] = _interpolate_params(payload["params"], state, cfg.dry_run)
+                    if payload["params"].get("__skip__"):
+                        skip_message = str(payload["params"].pop("__skip__"))
+                        step_result = StepResult(
+                            step=step_index,
+                            dsl=dsl_line,
+                            payload=payload,
+                            status="skipped",
+                            elapsed_ms=_elapsed_ms(started),
+                            output=None,
+                            stored_id=None,
+                            error=skip_message,
+                        )
+                        _append_transcript(transcript_file, step_result)
+                        if completed is not None:
+                            completed += 1
+                        results.append(f"line {line_number}: skipped ({skip_message})")
+                        continue
+
+                    output = _execute_payload(
+                        payload,
+                        artifacts_dir,
+                        cfg.dry_run,
+                        timeout=cfg.timeout,
+                        keep_alive=cfg.keep_alive,
+                        llm_client=llm_client,
+                        step_index=step_index,
+                        a1111_url=cfg.a1111_url,
+                        a1111_timeout=cfg.a1111_timeout,
+                        cancel_on_timeout=cfg.cancel_on_timeout,
+                        out=out,
+                    )
+                    stored_id = _store_output_if_requested(state, payload, output)
+                    state.set_last_successful_step(
+                        step=step_index,
+                        line_number=line_number,
+                        script=script_id,
+                    )
+                    # Append just this step's changes instead of rewriting state.json every step.
+                    if state_log is None:
+                        state_log = state_log_path.open("a", encoding="utf-8")
+                    _append_state_update(state_log, state, stored_id)
+
                     step_result = StepResult(
                         step=step_index,
                         dsl=dsl_line,
                         payload=payload,
-                        status="skipped",
+                        status="success",
+                        elapsed_ms=_elapsed_ms(started),
+                        output=_summarize_output_for_transcript(payload, output),
+                        stored_id=stored_id,
+                        error=None,
+                    )
+                    _append_transcript(transcript_file, step_result)
+                    if completed is not None:
+                        completed += 1
+                    results.append(f"line {line_number}: {output}")
+                except DSLParseError as exc:
+                    step_result = StepResult(
+                        step=step_index,
+                        dsl=dsl_line,
+                        payload=payload or {},
+                        status="error",
                         elapsed_ms=_elapsed_ms(started),
                         output=None,
                         stored_id=None,
-                        error=skip_message,
+                        error=f"parse error: {exc}",
                     )
+                    # State is unchanged since the last save; only the transcript records the failure.
                     _append_transcript(transcript_file, step_result)
-                    results.append(f"line {line_number}: skipped ({skip_message})")
-                    continue
-
-                output = _execute_payload(
-                    payload,
-                    artifacts_dir,
-                    cfg.dry_run,
-                    timeout=cfg.timeout,
-                    keep_alive=cfg.keep_alive,
-                    llm_client=cfg.llm_client,
-                    step_index=step_index,
-                    a1111_url=cfg.a1111_url,
-                    a1111_timeout=cfg.a1111_timeout,
-                    cancel_on_timeout=cfg.cancel_on_timeout,
-                )
-                stored_id = _store_output_if_requested(state, payload, output)
-                state.set_last_successful_step(
-                    step=step_index,
-                    line_number=line_number,
-                    script=str(path.resolve()),
-                )
-                state.save_atomic(state_path)
-
-                step_result = StepResult(
-                    step=step_index,
-                    dsl=dsl_line,
-                    payload=payload,
-                    status="success",
-                    elapsed_ms=_elapsed_ms(started),
-                    output=_summarize_output_for_transcript(payload, output),
-                    stored_id=stored_id,
-                    error=None,
-                )
-                _append_transcript(transcript_file, step_result)
-                results.append(f"line {line_number}: {output}")
-            except DSLParseError as exc:
-                step_result = StepResult(
-                    step=step_index,
-                    dsl=dsl_line,
-                    payload=payload or {},
-                    status="error",
-                    elapsed_ms=_elapsed_ms(started),
-                    output=None,
-                    stored_id=None,
-                    error=f"parse error: {exc}",
-                )
-                _append_transcript(transcript_file, step_result)
-                state.save_atomic(state_path)
-                raise RunError(
-                    _format_script_error(
-                        script_path=path,
-                        line_number=line_number,
-                        dsl_line=dsl_line,
-                        reason=f"parse error: {exc}",
-                        hint="Fix the DSL syntax for this line and re-run.",
-                    )
-                ) from exc
-            except RunError as exc:
-                step_result = StepResult(
-                    step=step_index,
-                    dsl=dsl_line,
-                    payload=payload or {},
-                    status="error",
-                    elapsed_ms=_elapsed_ms(started),
-                    output=None,
-                    stored_id=None,
-                    error=str(exc),
-                )
-                _append_transcript(transcript_file, step_result)
-                state.save_atomic(state_path)
-                raise RunError(
-                    _format_script_error(
-                        script_path=path,
-                        line_number=line_number,
-                        dsl_line=dsl_line,
-                        reason=str(exc),
-                        hint="Check adapter name/params or fix missing references, then retry.",
+                    raise RunError(
+                        _format_script_error(
+                            script_path=path,
+                            line_number=line_number,
+                            dsl_line=dsl_line,
+                            reason=f"parse error: {exc}",
+                            hint="Fix the DSL syntax for this line and re-run.",
+                        )
+                    ) from exc
+                except RunError as exc:
+                    step_result = StepResult(
+                        step=step_index,
+                        dsl=dsl_line,
+                        payload=payload or {},
+                        status="error",
+                        elapsed_ms=_elapsed_ms(started),
+                        output=None,
+                        stored_id=None,
+                        error=str(exc),
                     )
-                ) from exc
+                    _append_transcript(transcript_file, step_result)
+                    raise RunError(
+                        _format_script_error(
+                            script_path=path,
+                            line_number=line_number,
+                            dsl_line=dsl_line,
+                            reason=str(exc),
+                            hint="Check adapter name/params or fix missing references, then retry.",
+                        )
+                    ) from exc
+    finally:
+        if state_log is not None:
+            state_log.close()
+            state.compact(state_path, state_log_path)
+        _save_progress(progress_path, transcript_path, completed)
 
     return results
 
 
-def _determine_start_index(resume: int | bool | None, transcript_path: Path) -> int:
+def _determine_start_index(resume: int | bool | None, completed: int | None, transcript_path: Path) -> int:
     if isinstance(resume, int) and not isinstance(resume, bool):
         return resume - 1
     if not resume:
         return 0
-    return _count_completed_steps(transcript_path)
+    return completed if completed is not None else _count_completed_steps(transcript_path)
 
 
 def _default_run_dir(script_path: Path) -> Path:
@@ -297,11 +356,25 @@ def _format_script_error(
     )
 
 
+def _known_completed_steps(transcript_path: Path, progress_path: Path) -> int | None:
+    if not transcript_path.exists():
+        return 0
+    # progress.json is trusted only if the transcript hasn't changed size since it was written.
+    progress = _load_progress(progress_path)
+    if progress is None or progress.get("transcript_bytes") != transcript_path.stat().st_size:
+        return None
+    completed = progress.get("completed")
+    if isinstance(completed, int) and not isinstance(completed, bool) and completed >= 0:
+        return completed
+    return None
+
+
 def _count_completed_steps(transcript_path: Path) -> int:
     if not transcript_path.exists():
         return 0
     completed = 0
-    for line in transcript_path.read_text(encoding="utf-8").splitlines():
+    # json.loads takes UTF-8 bytes directly, so only the record payloads are decoded.
+    for line in transcript_path.read_bytes().splitlines():
         if not line.strip():
             continue
         record = json.loads(line)
@@ -310,6 +383,27 @@ def _count_completed_steps(transcript_path: Path) -> int:
     return completed
 
 
+def _load_progress(progress_path: Path) -> dict[str, Any] | None:
+    try:
+        payload = json.loads(progress_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def _save_progress(progress_path: Path, transcript_path: Path, completed: int | None) -> None:
+    if completed is None:
+        progress_path.unlink(missing_ok=True)
+        return
+    transcript_bytes = transcript_path.stat().st_size if transcript_path.exists() else 0
+    tmp_path = progress_path.with_suffix(progress_path.suffix + ".tmp")
+    tmp_path.write_text(
+        _encode_compact({"completed": completed, "transcript_bytes": transcript_bytes}),
+        encoding="utf-8",
+    )
+    tmp_path.replace(progress_path)
+
+
 def _interpolate_params(params: dict[str, Any], state: RunnerState, dry_run: bool) -> dict[str, Any]:
     interpolated: dict[str, Any] = {}
     for key, value in params.items():
@@ -327,6 +421,8 @@ def _interpolate_params(params: dict[str, Any], state: RunnerState, dry_run: boo
 
 
 def _interpolate_string(value: str, state: RunnerState) -> str:
+    if "@" not in value:
+        return value
     missing: list[str] = []
 
     def _replace(match: re.Match[str]) -> str:
@@ -374,6 +470,7 @@ def _execute_payload(
     a1111_url: str | None = None,
     a1111_timeout: float | None = None,
     cancel_on_timeout: bool = False,
+    out: TextIO | None = None,
 ) -> str:
     if payload.get("op") == "gen" and payload.get("target") == "script":
         return _handle_gen_script_payload(payload, artifacts_dir, dry_run)
@@ -395,6 +492,7 @@ def _execute_payload(
         "a1111_url": a1111_url,
         "a1111_timeout": a1111_timeout,
         "cancel_on_timeout": cancel_on_timeout,
+        "out": out,
     }
     return run_adapter(
         tool_name,
@@ -422,7 +520,8 @@ def _store_output_if_requested(state: RunnerState, payload: dict[str, Any], outp
 def _summarize_output_for_transcript(payload: dict[str, Any], output: Any) -> Any:
     if not _is_a1111_toolcall(payload):
         return output
-    if not isinstance(output, str):
+    # Adapter file lists are JSON arrays; skip the decode for any other output.
+    if not isinstance(output, str) or not output.lstrip().startswith("["):
         return output
     try:
         decoded = json.loads(output)
@@ -443,18 +542,24 @@ def _is_a1111_toolcall(payload: dict[str, Any]) -> bool:
 def _is_safe_relative_path(value: Any) -> bool:
     if not isinstance(value, str) or not value:
         return False
-    path = PurePosixPath(value)
-    if path.is_absolute():
-        return False
-    return all(part not in {"", ".", ".."} for part in path.parts)
+    # Same verdict as PurePosixPath(value).parts, which drops "" and "." segments.
+    return not value.startswith("/") and ".." not in value.split("/")
 
 
 def _append_transcript(transcript_file: Any, step_result: StepResult) -> None:
     transcript_file.write(
-        json.dumps(step_result.to_transcript_record(), sort_keys=True, separators=(",", ":")) + "\n"
+        _encode_compact(step_result.to_transcript_record()) + "\n"
     )
     transcript_file.flush()
 
 
-def _elapsed_ms(started: float) -> int:
-    return int((time.perf_counter() - started) * 1000)
+def _append_state_update(state_log: Any, state: RunnerState, stored_id: str | None) -> None:
+    update = {"_runner": state["_runner"]}
+    if stored_id is not None:
+        update[stored_id] = state[stored_id]
+    state_log.write(_encode_compact(update) + "\n")
+    state_log.flush()
+
+
+def _elapsed_ms(started: int) -> int:
+    return (time.perf_counter_ns() - started) // 1_000_000
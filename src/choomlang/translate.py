@@ -1,15 +1,19 @@
-"""High-level translation helpers."""
+"""High-level translation helpers.
+
+DSL and JSON payloads are exchanged as Python objects; JSON text is only
+decoded or encoded at the process input/output boundary.
+"""
 
 from __future__ import annotations
 
 import json
 from typing import Any
 
-from .dsl import parse_dsl, serialize_dsl
+from .dsl import parse_dsl_json, serialize_dsl
 
 
 def dsl_to_json(dsl_line: str) -> dict[str, Any]:
-    return parse_dsl(dsl_line).to_json_dict()
+    return parse_dsl_json(dsl_line)
 
 
 def dsl_to_json_text(dsl_line: str, *, indent: int = 2) -> str:
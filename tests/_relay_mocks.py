@@ -0,0 +1,15 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class MockChatClient:
+    """Relay client stub that replays canned chat outputs in order."""
+
+    outputs: list[str]
+    timeout: float = 180.0
+    keep_alive: float = 300.0
+    calls: list[dict] = field(default_factory=list)
+
+    def chat(self, model, messages, seed=None, response_format=None):
+        self.calls.append({"model": model, "messages": messages, "response_format": response_format})
+        return self.outputs[len(self.calls) - 1], 5, 200
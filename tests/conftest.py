@@ -1,4 +1,43 @@
+import hashlib
 import sys
 from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--cached",
+        action="store_true",
+        default=False,
+        help="skip golden tests that passed last run when package sources, golden test code, and golden files are unchanged",
+    )
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    if report.when == "call":
+        item.call_passed = report.passed
+
+
+@pytest.fixture(scope="session")
+def golden_cache_key() -> str:
+    """Digest of the package version, package sources, golden test code, and golden files."""
+    from choomlang import __version__
+
+    digest = hashlib.blake2b(__version__.encode("utf-8"), digest_size=16)
+    tests_dir = ROOT / "tests"
+    paths = (
+        sorted((ROOT / "src" / "choomlang").rglob("*.py"))
+        + [tests_dir / "conftest.py", tests_dir / "test_golden.py"]
+        + sorted((tests_dir / "golden").iterdir())
+    )
+    for path in paths:
+        digest.update(path.relative_to(ROOT).as_posix().encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
@@ -1,4 +1,5 @@
 import base64
+import io
 import json
 import socket
 from pathlib import Path
@@ -213,7 +214,7 @@ def test_a1111_txt2img_timeout_triggers_interrupt_when_enabled(tmp_path, monkeyp
     assert 'interrupt succeeded' in captured
 
 
-def test_a1111_txt2img_retries_transient_error(tmp_path, monkeypatch):
+def test_a1111_txt2img_retries_transient_error(tmp_path, monkeypatch, capsys):
     attempts = {'count': 0}
 
     def fake_urlopen(req, timeout=None):
@@ -225,15 +226,19 @@ def test_a1111_txt2img_retries_transient_error(tmp_path, monkeypatch):
 
     monkeypatch.setattr('choomlang.adapters.request.urlopen', fake_urlopen)
 
+    messages = io.StringIO()
     out = run_adapter(
         'a1111_txt2img',
         {'prompt': 'cat', 'step': 3},
         tmp_path / 'artifacts',
         False,
+        context={'out': messages},
     )
 
     assert attempts['count'] == 3
     assert json.loads(out) == ['a1111_txt2img_0003_01_seedx.png']
+    assert messages.getvalue().count('retrying') == 2
+    assert capsys.readouterr().out == ''
 
 def test_resolve_artifact_path_rejects_traversal_and_absolute_paths(tmp_path):
     artifacts_dir = tmp_path / "artifacts"
@@ -244,3 +249,32 @@ def test_resolve_artifact_path_rejects_traversal_and_absolute_paths(tmp_path):
 
     with pytest.raises(RunError, match="absolute paths are not allowed"):
         resolve_artifact_path(artifacts_dir, "/tmp/escape.png")
+
+
+def test_resolve_artifact_path_rejects_symlink_escape(tmp_path):
+    artifacts_dir = tmp_path / "artifacts"
+    artifacts_dir.mkdir()
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (artifacts_dir / "link").symlink_to(outside, target_is_directory=True)
+
+    resolved, rel = resolve_artifact_path(artifacts_dir, "sub/ok.png")
+    assert resolved == artifacts_dir.resolve() / "sub" / "ok.png"
+    assert rel == "sub/ok.png"
+
+    with pytest.raises(RunError, match="must stay within artifacts"):
+        resolve_artifact_path(artifacts_dir, "link/escape.png")
+
+
+def test_resolve_artifact_path_follows_retargeted_root(tmp_path):
+    first = tmp_path / "first"
+    second = tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+    artifacts_dir = tmp_path / "artifacts"
+    artifacts_dir.symlink_to(first, target_is_directory=True)
+    assert resolve_artifact_path(artifacts_dir, "a.png")[0] == first.resolve() / "a.png"
+
+    artifacts_dir.unlink()
+    artifacts_dir.symlink_to(second, target_is_directory=True)
+    assert resolve_artifact_path(artifacts_dir, "a.png")[0] == second.resolve() / "a.png"
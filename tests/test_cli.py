@@ -1,11 +1,14 @@
+import io
 import json
+import sys
 
-from choomlang.cli import main
+import pytest
 
+from choomlang import __version__, cli
+from choomlang.cli import main, run
 
-def test_cli_version(capsys):
-    import pytest
 
+def test_cli_version(capsys):
     with pytest.raises(SystemExit) as exc:
         main(["--version"])
     out = capsys.readouterr().out.strip()
@@ -29,6 +32,13 @@ def test_cli_translate_autodetect_json_to_dsl(capsys):
     assert out == "gen img[2] res=1024x1024 style=studio"
 
 
+def test_cli_translate_autodetect_json_array_reports_json_error(capsys):
+    code = main(["translate", '[{"op":"gen"}]'])
+    err = capsys.readouterr().err
+    assert code == 2
+    assert "JSON input must be an object" in err
+
+
 def test_cli_translate_compact_json(capsys):
     code = main(["translate", "gen txt tone=noir", "--compact"])
     out = capsys.readouterr().out.strip()
@@ -227,6 +237,64 @@ def test_cli_validate_suggests_lenient_for_trailing_dot(capsys):
     assert "try --lenient" in err
 
 
+def test_cli_run_returns_buffered_output_without_touching_stdout(capsys):
+    code, out, err = run(["validate", "gen txt mood"])
+    assert (code, out) == (2, "")
+    assert "did you mean mood=<value>?" in err
+    assert run(["fmt", "gen txt b=2 a=1"]) == (0, "gen txt a=1 b=2\n", "")
+    assert run(["guard"])[0] == 0
+    assert capsys.readouterr() == ("", "")
+
+
+def test_cli_run_captures_argparse_exits(capsys):
+    assert run(["--version"]) == (0, f"choom {__version__}\n", "")
+    code, out, err = run(["bogus"])
+    assert (code, out) == (2, "")
+    assert err.startswith("usage: choom")
+    code, out, _err = run(["--help"])
+    assert code == 0
+    assert "ChoomLang CLI" in out
+    assert capsys.readouterr() == ("", "")
+
+
+def test_cli_run_hands_its_buffers_to_the_runner(monkeypatch, tmp_path, capsys):
+    script = tmp_path / "demo.choom"
+    script.write_text("toolcall tool name=echo id=1\n", encoding="utf-8")
+    seen: list[object] = []
+    real_run_script = cli.run_script
+
+    def spy_run_script(script_path, **kwargs):
+        seen.append(sys.stdout)
+        return real_run_script(script_path, **kwargs)
+
+    monkeypatch.setattr(cli, "run_script", spy_run_script)
+    process_stdout = sys.stdout
+    code, out, err = run(["run", str(script), "--dry-run", "--resume", "1", "--workdir", str(tmp_path / "w")])
+    assert code == 0
+    assert out.startswith("line 1:")
+    assert err == "resume: step 1 of 1\n"
+    assert seen == [process_stdout]
+    assert capsys.readouterr() == ("", "")
+
+
+def test_cli_main_writes_argparse_errors_to_given_err(capsys):
+    err = io.StringIO()
+    with pytest.raises(SystemExit):
+        main(["bogus"], out=io.StringIO(), err=err)
+    assert err.getvalue().startswith("usage: choom")
+    assert capsys.readouterr() == ("", "")
+
+
+def test_cli_main_writes_to_given_streams(capsys):
+    out = io.StringIO()
+    err = io.StringIO()
+    assert main(["translate", "--compact", "jack txt a=1"], out=out, err=err) == 0
+    assert main(["lint", "gen txt b=1 a=2"], out=out, err=err) == 1
+    assert out.getvalue() == '{"count":1,"op":"gen","params":{"a":1},"target":"txt"}\n'
+    assert err.getvalue() == "warn: non-canonical DSL formatting; run `choom fmt`\n"
+    assert capsys.readouterr() == ("", "")
+
+
 def test_cli_validate_warns_unknown_op_target(capsys):
     code = main(["validate", "invent unknown k=v"])
     captured = capsys.readouterr()
@@ -263,7 +331,8 @@ def test_cli_demo_shortcut(monkeypatch, capsys):
     assert captured["log_path"] == "choom_demo.jsonl"
 
 
-def test_cli_run_uses_filtered_script_lines(capsys, tmp_path):
+def test_cli_run_uses_filtered_script_lines(capsys, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
     script = tmp_path / "run.choom"
     script.write_text(
         "\n"
@@ -282,7 +351,8 @@ def test_cli_run_uses_filtered_script_lines(capsys, tmp_path):
     assert out[1].startswith("line 5:")
 
 
-def test_cli_run_resume_and_max_steps(capsys, tmp_path):
+def test_cli_run_resume_and_max_steps(capsys, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
     script = tmp_path / "run.choom"
     script.write_text(
         "toolcall tool name=echo id=1\n"
@@ -400,7 +470,8 @@ def test_cli_run_a1111_url_default_when_env_absent(monkeypatch, tmp_path):
     assert code == 0
     assert captured["a1111_url"] == "http://127.0.0.1:7860"
 
-def test_cli_run_reports_actionable_errors(capsys, tmp_path):
+def test_cli_run_reports_actionable_errors(capsys, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
     bad_parse = tmp_path / "bad_parse.choom"
     bad_parse.write_text("broken\n", encoding="utf-8")
 
@@ -419,7 +490,8 @@ def test_cli_run_reports_actionable_errors(capsys, tmp_path):
     assert "dsl='toolcall tool name=unknown'" in err
 
 
-def test_cli_run_resume_out_of_range_is_clear_and_nonzero(capsys, tmp_path):
+def test_cli_run_resume_out_of_range_is_clear_and_nonzero(capsys, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
     script = tmp_path / "demo.choom"
     script.write_text("toolcall tool name=echo\n", encoding="utf-8")
 
@@ -448,3 +520,15 @@ def test_cli_script_validate_only(capsys, tmp_path):
     captured = capsys.readouterr()
     assert code == 0
     assert captured.out.strip() == "ok"
+
+
+def test_cli_reused_parser_does_not_leak_state_between_calls(capsys):
+    code = main(["profile", "apply", "wallpaper", "gen img", "--set", "seed=7"])
+    first = capsys.readouterr().out.strip()
+    assert code == 0
+    assert "seed=7" in first
+
+    code = main(["profile", "apply", "wallpaper", "gen img"])
+    second = capsys.readouterr().out.strip()
+    assert code == 0
+    assert "seed=" not in second
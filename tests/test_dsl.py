@@ -1,7 +1,24 @@
+import sys
+
 import pytest
 
-from choomlang.dsl import DSLParseError, format_dsl, parse_dsl, serialize_dsl
-from choomlang.protocol import parse_script_text
+from choomlang import dsl
+from choomlang.dsl import (
+    DSLParseError,
+    format_dsl,
+    parse_dsl,
+    parse_dsl_json,
+    parse_many,
+    parse_validate_serialize,
+    serialize_dsl,
+)
+from choomlang.protocol import (
+    iter_script_lines,
+    parse_script_text,
+    read_script_lines,
+    strip_inline_comment,
+    validate_script_text,
+)
 
 
 def test_roundtrip_dsl_json_dsl():
@@ -107,3 +124,107 @@ classify txt label=ok # comment
 def test_parse_script_text_reports_line_error():
     with pytest.raises(DSLParseError, match="line 2"):
         parse_script_text("gen txt prompt=ok\ninvalid")
+
+
+def test_parse_dsl_cache_returns_independent_params():
+    parse_dsl.cache_clear()
+    first = parse_dsl("gen txt tone=noir")
+    first.params["tone"] = "mutated"
+
+    second = parse_dsl("gen txt tone=noir")
+    assert second.params == {"tone": "noir"}
+    assert format_dsl("gen txt tone=noir") == "gen txt tone=noir"
+
+
+def test_parse_dsl_skips_cache_for_long_lines():
+    parse_dsl.cache_clear()
+    long_line = "gen txt prompt=" + "x" * dsl.CACHEABLE_LINE_LENGTH
+    assert parse_dsl(long_line).params["prompt"].startswith("x")
+    assert format_dsl(long_line) == long_line
+    assert dsl._parse_dsl_cached.cache_info().currsize == 0
+    assert dsl._format_dsl_cached.cache_info().currsize == 0
+
+
+def test_parse_validate_serialize_reports_registry_membership():
+    parsed, canonical, op_known, target_known = parse_validate_serialize("jack img[2] z=1 a=2")
+    assert parsed.op == "gen"
+    assert canonical == "gen img[2] a=2 z=1"
+    assert (op_known, target_known) == (True, True)
+
+    _parsed, canonical, op_known, target_known = parse_validate_serialize("invent thing k=v")
+    assert canonical == "invent thing k=v"
+    assert (op_known, target_known) == (False, False)
+
+
+def test_parse_validate_serialize_result_does_not_alias_cache():
+    parsed, _canonical, _op_known, _target_known = parse_validate_serialize("gen txt a=1")
+    parsed.params["a"] = 2
+    assert parse_dsl("gen txt a=1").params == {"a": 1}
+    assert parse_dsl_json("gen txt a=1")["params"] == {"a": 1}
+
+
+def test_parse_many_returns_errors_in_place():
+    results = parse_many(["jack img[2] a=1", "gen", "ping txt ."], lenient=True)
+    assert results[0] == parse_dsl("jack img[2] a=1")
+    assert isinstance(results[1], DSLParseError)
+    assert (results[2].op, results[2].target) == ("healthcheck", "txt")
+
+    results[0].params["a"] = 99
+    assert parse_many(["jack img[2] a=1"])[0].params == {"a": 1}
+
+
+def test_strip_inline_comment_respects_quotes_and_escapes():
+    assert strip_inline_comment('gen txt a=1 # note') == "gen txt a=1"
+    assert strip_inline_comment(r'gen txt msg="say \"#hi\"" # note') == r'gen txt msg="say \"#hi\""'
+    assert strip_inline_comment('gen txt msg="open #quote') == 'gen txt msg="open #quote'
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n", "\r"])
+def test_read_script_lines_large_file_matches_text_path(tmp_path, newline):
+    lines = []
+    for i in range(4000):
+        lines.extend(["", "# comment", f"gen txt n={i} # trailing", f'classify txt label="#{i}"'])
+    text = newline.join(lines) + newline
+    script = tmp_path / "big.choom"
+    script.write_bytes(text.encode("utf-8"))
+
+    assert script.stat().st_size > 64 * 1024
+    assert read_script_lines(script) == iter_script_lines(text)
+
+
+@pytest.mark.parametrize("size", [1024, 64 * 1024])
+def test_read_script_lines_rejects_invalid_utf8_in_comments(tmp_path, size):
+    body = b"gen txt a=1\n# bad \xff byte\n"
+    filler = b"# pad\n" * (size // 6 + 1)
+    script = tmp_path / "bad.choom"
+    script.write_bytes(body + filler if size > 1024 else body)
+
+    assert (script.stat().st_size >= 64 * 1024) is (size > 1024)
+    with pytest.raises(UnicodeDecodeError):
+        read_script_lines(script)
+
+
+def test_parse_dsl_interns_op_and_target():
+    parsed = parse_dsl("".join(["ja", "ck"]) + " " + "".join(["im", "g"]))
+    assert parsed.op is sys.intern("gen")
+    assert parsed.target is sys.intern("img")
+
+
+def test_parsed_command_uses_slots():
+    parsed = parse_dsl("gen txt")
+    assert not hasattr(parsed, "__dict__")
+
+
+def test_validate_script_text_reports_first_bad_line():
+    validate_script_text("gen txt prompt=ok\n# note\nclassify txt label=a\n")
+    with pytest.raises(DSLParseError, match="line 2"):
+        validate_script_text("gen txt prompt=ok\ninvalid\nalso bad")
+
+
+def test_parse_dsl_json_matches_parse_dsl_and_owns_params():
+    line = 'jack img[2] style=studio prompt="neon city"'
+    payload = parse_dsl_json(line)
+    assert payload == parse_dsl(line).to_json_dict()
+
+    payload["params"]["style"] = "mutated"
+    assert parse_dsl_json(line)["params"]["style"] == "studio"
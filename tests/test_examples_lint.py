@@ -1,17 +1,17 @@
 from pathlib import Path
 
-from choomlang.dsl import parse_dsl
+from choomlang.dsl import DSLParseError, parse_many
 
 
 def _iter_example_lines() -> list[tuple[str, int, str]]:
     rows: list[tuple[str, int, str]] = []
     for path in sorted(Path("examples").glob("*.choom")):
-        text = path.read_text(encoding="utf-8")
-        for line_no, raw_line in enumerate(text.splitlines(), start=1):
-            line = raw_line.strip()
-            if not line or line.startswith("#"):
+        # Filter blanks/comments on bytes; only decode the lines we keep.
+        for line_no, raw_line in enumerate(path.read_bytes().splitlines(), start=1):
+            stripped = raw_line.strip()
+            if not stripped or stripped.startswith(b"#"):
                 continue
-            rows.append((str(path), line_no, line))
+            rows.append((str(path), line_no, stripped.decode("utf-8")))
     return rows
 
 
@@ -19,8 +19,10 @@ def test_examples_all_choom_lines_parse_as_valid_dsl():
     lines = _iter_example_lines()
     assert lines, "expected at least one .choom line to lint"
 
-    for path, line_no, line in lines:
-        try:
-            parse_dsl(line)
-        except Exception as exc:  # pragma: no cover - assertion path only
-            raise AssertionError(f"{path}:{line_no} failed DSL parse: {line}\n{exc}") from exc
+    results = parse_many([line for _, _, line in lines])
+    failures = [
+        f"{path}:{line_no} failed DSL parse: {line}\n{result}"
+        for (path, line_no, line), result in zip(lines, results)
+        if isinstance(result, DSLParseError)
+    ]
+    assert not failures, "\n".join(failures)
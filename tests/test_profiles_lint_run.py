@@ -1,4 +1,8 @@
 import json
+import re
+from pathlib import Path
+
+import pytest
 
 from choomlang import __version__
 from choomlang.cli import main
@@ -10,11 +14,14 @@ from choomlang.profiles import (
     validate_profile_payload,
 )
 from choomlang.errors import RunError
-from choomlang.run import run_toolcall
+from choomlang.run import run_toolcall, run_toolcall_script
 
 
-def test_version_is_1_0_0rc1():
-    assert __version__ == "1.0.0rc1"
+def test_version_matches_pyproject():
+    pyproject = (Path(__file__).resolve().parents[1] / "pyproject.toml").read_text(encoding="utf-8")
+    match = re.search(r'^version = "([^"]+)"$', pyproject, re.MULTILINE)
+    assert match is not None
+    assert __version__ == match.group(1)
 
 
 def test_profile_schema_validation_helper_valid_and_invalid():
@@ -42,57 +49,55 @@ def test_profile_schema_validation_helper_valid_and_invalid():
         raise AssertionError("expected validation failure")
 
 
-def test_profile_list_and_apply_deterministic(tmp_path):
-    profile_dir = tmp_path / "profiles"
-    profile_dir.mkdir()
-    (profile_dir / "demo.json").write_text(
-        """{
+_PROFILES_JSON = {
+    "demo": """{
   "name": "demo",
   "tags": ["image", "cinematic"],
   "defaults": {"res": "1920x1080", "style": "cinematic"},
   "notes": "demo"
 }
 """,
-        encoding="utf-8",
-    )
+    "wallpaper": '{"name":"wallpaper","tags":["Image","cinematic"],"description":"Wide wallpaper","defaults":{"res":"1920x1080"}}',
+    "brief_writer": '{"name":"brief_writer","tags":["text"],"description":"Concise writing","defaults":{"tone":"clear"}}',
+}
 
-    names = list_profiles(profiles_dir=profile_dir)
-    assert names == ["demo"]
-    result = apply_profile_to_dsl(
-        "demo",
-        "gen img[2] prompt=city",
-        profiles_dir=profile_dir,
-        overrides={"style": "retro", "seed": 12},
-    )
-    assert result == "gen img[2] prompt=city res=1920x1080 seed=12 style=retro"
 
+@pytest.fixture(scope="session")
+def demo_profiles_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("profiles")
+    for name, text in _PROFILES_JSON.items():
+        (directory / f"{name}.json").write_text(text, encoding="utf-8")
+    return directory
 
-def test_profile_apply_preserves_op_target_count(tmp_path):
-    profile_dir = tmp_path / "profiles"
-    profile_dir.mkdir()
-    (profile_dir / "demo.json").write_text(
-        '{"name":"demo","defaults":{"tone":"calm"}}',
-        encoding="utf-8",
-    )
 
-    result = apply_profile_to_dsl("demo", "summarize txt[3] prompt=hello", profiles_dir=profile_dir)
-    assert result.startswith("summarize txt[3] ")
+def test_profile_list_is_sorted(demo_profiles_dir):
+    assert list_profiles(profiles_dir=demo_profiles_dir) == ["brief_writer", "demo", "wallpaper"]
 
 
-def test_profile_search_and_tag_filter(tmp_path):
-    profile_dir = tmp_path / "profiles"
-    profile_dir.mkdir()
-    (profile_dir / "wallpaper.json").write_text(
-        '{"name":"wallpaper","tags":["Image","cinematic"],"description":"Wide wallpaper","defaults":{"res":"1920x1080"}}',
-        encoding="utf-8",
-    )
-    (profile_dir / "brief_writer.json").write_text(
-        '{"name":"brief_writer","tags":["text"],"description":"Concise writing","defaults":{"tone":"clear"}}',
-        encoding="utf-8",
-    )
+@pytest.mark.parametrize(
+    ("dsl", "overrides", "expected"),
+    [
+        (
+            "gen img[2] prompt=city",
+            {"style": "retro", "seed": 12},
+            "gen img[2] prompt=city res=1920x1080 seed=12 style=retro",
+        ),
+        (
+            "summarize txt[3] prompt=hello",
+            None,
+            "summarize txt[3] prompt=hello res=1920x1080 style=cinematic",
+        ),
+    ],
+)
+def test_profile_apply_deterministic(demo_profiles_dir, dsl, overrides, expected):
+    result = apply_profile_to_dsl("demo", dsl, profiles_dir=demo_profiles_dir, overrides=overrides)
+    assert result == expected
+
 
-    assert list_profiles(profiles_dir=profile_dir, tag="image") == ["wallpaper"]
-    assert search_profiles("CONCISE", profiles_dir=profile_dir) == ["brief_writer"]
+def test_profile_search_and_tag_filter(demo_profiles_dir):
+    assert list_profiles(profiles_dir=demo_profiles_dir, tag="image") == ["demo", "wallpaper"]
+    assert list_profiles(profiles_dir=demo_profiles_dir, tag="text") == ["brief_writer"]
+    assert search_profiles("CONCISE", profiles_dir=demo_profiles_dir) == ["brief_writer"]
 
 
 def test_cli_profile_show(capsys):
@@ -171,7 +176,13 @@ def test_lint_strict_unknown_registry_warnings(capsys):
     code = main(["lint", "newop txt x=1", "--strict-ops"])
     err = capsys.readouterr().err
     assert code == 1
-    assert "unknown op" in err
+    assert "unknown op 'newop' in strict registry mode" in err
+
+    code = main(["lint", "gen thing x=1", "--strict-targets"])
+    err = capsys.readouterr().err
+    assert code == 1
+    assert "unknown target 'thing' in strict registry mode" in err
+    assert "unknown op" not in err
 
 
 def test_run_toolcall_dry_run_and_write_file(tmp_path):
@@ -202,7 +213,8 @@ def test_run_blocks_path_traversal(tmp_path):
         raise AssertionError("expected path traversal RunError")
 
 
-def test_cli_run_dry_run(capsys, tmp_path):
+def test_cli_run_dry_run(capsys, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
     script = tmp_path / "demo.choom"
     script.write_text("toolcall tool name=echo id=123\n", encoding="utf-8")
 
@@ -215,25 +227,26 @@ def test_cli_run_dry_run(capsys, tmp_path):
 
 def test_run_toolcall_read_mkdir_and_list_dir(tmp_path):
     out_dir = tmp_path / "out"
-    created = run_toolcall("toolcall tool name=mkdir path=docs", out_dir=str(out_dir), dry_run=False)
-    assert created == "docs"
-
-    run_toolcall(
-        "toolcall tool name=write_file path=docs/b.txt text=two",
-        out_dir=str(out_dir),
-        dry_run=False,
-    )
-    run_toolcall(
-        "toolcall tool name=write_file path=docs/a.txt text=one",
+    results = run_toolcall_script(
+        """toolcall tool name=mkdir path=docs
+toolcall tool name=write_file path=docs/b.txt text=two
+toolcall tool name=write_file path=docs/a.txt text=one
+toolcall tool name=list_dir path=docs
+toolcall tool name=read_file path=docs/a.txt
+""",
         out_dir=str(out_dir),
-        dry_run=False,
     )
+    assert results == ["docs", "docs/b.txt", "docs/a.txt", '["a.txt","b.txt"]', "one"]
 
-    listing = run_toolcall("toolcall tool name=list_dir path=docs", out_dir=str(out_dir), dry_run=False)
-    assert listing == '["a.txt","b.txt"]'
 
-    content = run_toolcall("toolcall tool name=read_file path=docs/a.txt", out_dir=str(out_dir), dry_run=False)
-    assert content == "one"
+def test_run_toolcall_script_validates_every_line_first(tmp_path):
+    out_dir = tmp_path / "out"
+    with pytest.raises(RunError, match="line 3: choom run only supports"):
+        run_toolcall_script(
+            "toolcall tool name=mkdir path=docs\n# comment\ngen txt prompt=hi\n",
+            out_dir=str(out_dir),
+        )
+    assert not out_dir.exists()
 
 
 def test_run_blocks_absolute_paths(tmp_path):
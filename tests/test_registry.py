@@ -1,6 +1,9 @@
+import sys
+
 import pytest
 
-from choomlang.registry import normalize_op, validate_payload
+from choomlang import dsl, registry
+from choomlang.registry import CANONICAL_OPS, normalize_op, validate_payload
 
 
 def test_validate_payload_strict_rejects_unknown_op():
@@ -16,3 +19,19 @@ def test_validate_payload_strict_rejects_unknown_target():
 def test_normalize_op_aliases():
     assert normalize_op("jack") == "gen"
     assert normalize_op("scan") == "classify"
+
+
+def test_registry_strings_are_interned():
+    assert normalize_op("jack") is sys.intern("gen")
+    assert all(op is sys.intern(op) for op in CANONICAL_OPS)
+
+
+def test_normalize_op_reads_current_alias_table(monkeypatch):
+    monkeypatch.setattr(registry, "OP_ALIASES", {"zap": "gen"})
+    assert normalize_op("zap") == "gen"
+    assert normalize_op("jack") == "jack"
+
+
+def test_dsl_alias_table_is_a_copy_of_registry_aliases():
+    assert dsl.ALIAS_TO_CANON == registry.OP_ALIASES
+    assert dsl.ALIAS_TO_CANON is not registry.OP_ALIASES
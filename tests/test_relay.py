@@ -1,7 +1,10 @@
+import io
 import json
 
 import pytest
 
+from _relay_mocks import MockChatClient
+from choomlang import relay
 from choomlang.protocol import build_contract_prompt
 from choomlang.relay import (
     RelayError,
@@ -60,9 +63,21 @@ def test_parse_structured_reply_strict_rejects_unknown_op_target():
     with pytest.raises(RelayError, match="field target='ping'"):
         parse_structured_reply('{"op":"gen","target":"ping"}')
 
-def test_parse_structured_reply_rejects_invalid_json():
-    with pytest.raises(RelayError, match="valid JSON"):
-        parse_structured_reply("nope")
+@pytest.mark.parametrize(
+    "raw,message",
+    [
+        ("nope", "valid JSON"),
+        ("not-json", "valid JSON"),
+        ('{"op":"gen","target":"script","params":{}}', "params.text is required string"),
+        (
+            '{"op":"gen","target":"script","params":{"text":"gen txt prompt=ok","prompt":"bad"}}',
+            "params.prompt is not allowed",
+        ),
+    ],
+)
+def test_parse_structured_reply_rejects_with_diagnostic(raw, message):
+    with pytest.raises(RelayError, match=message):
+        parse_structured_reply(raw)
 
 
 def test_contract_builder_dsl_has_grammar_bans_and_examples():
@@ -77,19 +92,23 @@ def test_contract_builder_structured_is_minimal_json_only():
     assert text == "Return JSON only. Match the requested schema exactly."
 
 
-def test_decide_structured_recovery_matrix():
-    assert decide_structured_recovery(
-        schema_failed=True, json_failed=False, strict=True, fallback_enabled=True
-    ) == "retry-json"
-    assert decide_structured_recovery(
-        schema_failed=True, json_failed=True, strict=True, fallback_enabled=True
-    ) == "fail-strict"
-    assert decide_structured_recovery(
-        schema_failed=True, json_failed=True, strict=False, fallback_enabled=True
-    ) == "fallback-dsl"
+@pytest.mark.parametrize(
+    "schema_failed,json_failed,strict,fallback_enabled,expected",
+    [
+        (True, False, True, True, "retry-json"),
+        (True, True, True, True, "fail-strict"),
+        (True, True, False, True, "fallback-dsl"),
+        (True, False, False, False, "fail-no-fallback"),
+        (False, True, True, False, "schema-ok"),
+    ],
+)
+def test_decide_structured_recovery_matrix(schema_failed, json_failed, strict, fallback_enabled, expected):
     assert decide_structured_recovery(
-        schema_failed=True, json_failed=False, strict=False, fallback_enabled=False
-    ) == "fail-no-fallback"
+        schema_failed=schema_failed,
+        json_failed=json_failed,
+        strict=strict,
+        fallback_enabled=fallback_enabled,
+    ) == expected
 
 
 def test_build_chat_request_for_structured_mode_enforces_stream_false():
@@ -206,21 +225,6 @@ def test_suggest_model_names_returns_close_matches():
     assert matches[0] == "llama3.2:latest"
 
 
-def test_parse_structured_reply_error_message_is_diagnostic():
-    with pytest.raises(RelayError, match="valid JSON"):
-        parse_structured_reply("not-json")
-
-
-def test_parse_structured_reply_requires_params_text_for_gen_script():
-    with pytest.raises(RelayError, match="params.text is required string"):
-        parse_structured_reply('{"op":"gen","target":"script","params":{}}')
-
-
-def test_parse_structured_reply_rejects_prompt_for_gen_script():
-    with pytest.raises(RelayError, match="params.prompt is not allowed"):
-        parse_structured_reply('{"op":"gen","target":"script","params":{"text":"gen txt prompt=ok","prompt":"bad"}}')
-
-
 def test_parse_structured_reply_validates_script_text_for_gen_script():
     with pytest.raises(RelayError, match="must be a valid multi-line ChoomLang script"):
         parse_structured_reply('{"op":"gen","target":"script","params":{"text":"oops"}}')
@@ -234,22 +238,13 @@ def test_parse_structured_reply_validates_script_text_for_gen_script():
 
 
 def test_run_relay_structured_no_repeat_retries_and_succeeds(capsys):
-    class MockClient:
-        def __init__(self):
-            self.timeout = 180.0
-            self.keep_alive = 300.0
-            self.calls = []
-            self.outputs = [
-                '{"op":"gen","target":"txt"}',
-                '{"op":"plan","target":"txt","params":{"step":"next"}}',
-                '{"op":"summarize","target":"txt","params":{"topic":"progress"}}',
-            ]
-
-        def chat(self, model, messages, seed=None, response_format=None):
-            self.calls.append({"model": model, "messages": messages, "response_format": response_format})
-            return self.outputs[len(self.calls) - 1], 5, 200
-
-    client = MockClient()
+    client = MockChatClient(
+        outputs=[
+            '{"op":"gen","target":"txt"}',
+            '{"op":"plan","target":"txt","params":{"step":"next"}}',
+            '{"op":"summarize","target":"txt","params":{"topic":"progress"}}',
+        ]
+    )
     transcript = run_relay(
         client=client,
         a_model="a",
@@ -271,21 +266,7 @@ def test_run_relay_structured_no_repeat_retries_and_succeeds(capsys):
 
 
 def test_run_relay_structured_allow_repeat_allows_exact_repeat(capsys):
-    class MockClient:
-        def __init__(self):
-            self.timeout = 180.0
-            self.keep_alive = 300.0
-            self.calls = []
-            self.outputs = [
-                '{"op":"gen","target":"txt"}',
-                '{"op":"gen","target":"txt"}',
-            ]
-
-        def chat(self, model, messages, seed=None, response_format=None):
-            self.calls.append({"model": model, "messages": messages, "response_format": response_format})
-            return self.outputs[len(self.calls) - 1], 5, 200
-
-    client = MockClient()
+    client = MockChatClient(outputs=['{"op":"gen","target":"txt"}'] * 2)
     transcript = run_relay(
         client=client,
         a_model="a",
@@ -303,3 +284,29 @@ def test_run_relay_structured_allow_repeat_allows_exact_repeat(capsys):
     assert len(client.calls) == 2
     err = capsys.readouterr().err
     assert "repeats_prevented=0" in err
+
+
+def test_run_relay_writes_summary_to_given_err(capsys):
+    client = MockChatClient(outputs=['{"op":"plan","target":"txt"}', '{"op":"gen","target":"txt"}'])
+    err = io.StringIO()
+    run_relay(
+        client=client,
+        a_model="a",
+        b_model="b",
+        turns=1,
+        structured=True,
+        use_schema=False,
+        start="gen txt",
+        err=err,
+    )
+    assert err.getvalue().startswith("relay summary: turns=2 ")
+    assert capsys.readouterr() == ("", "")
+
+
+def test_transcript_timestamp_matches_datetime_isoformat(monkeypatch):
+    for ns, expected in [
+        (1_700_000_000_123_456_789, "2023-11-14T22:13:20.123456+00:00"),
+        (1_700_000_001_000_000_000, "2023-11-14T22:13:21+00:00"),
+    ]:
+        monkeypatch.setattr(relay, "time_ns", lambda ns=ns: ns)
+        assert relay._utc_isoformat_now() == expected
@@ -1,3 +1,4 @@
+import io
 import json
 
 import pytest
@@ -106,6 +107,40 @@ def test_run_script_resume_uses_transcript_completed_steps(tmp_path):
     assert '"id": "three"' in outputs[0]
 
 
+def test_run_script_resume_reads_progress_sidecar_and_ignores_stale_one(tmp_path):
+    script = tmp_path / "demo.choom"
+    script.write_text(
+        "toolcall tool name=echo id=one\n"
+        "toolcall tool name=echo id=two\n"
+        "toolcall tool name=echo id=three\n",
+        encoding="utf-8",
+    )
+    workdir = tmp_path / "run"
+    run_script(str(script), config=RunnerConfig(workdir=str(workdir), dry_run=True, max_steps=1))
+    transcript = workdir / "transcript.jsonl"
+    progress = json.loads((workdir / "progress.json").read_text(encoding="utf-8"))
+    assert progress == {"completed": 1, "transcript_bytes": transcript.stat().st_size}
+
+    # A matching sidecar is trusted without rescanning the transcript.
+    (workdir / "progress.json").write_text(
+        json.dumps({"completed": 2, "transcript_bytes": transcript.stat().st_size}), encoding="utf-8"
+    )
+    outputs = run_script(str(script), config=RunnerConfig(workdir=str(workdir), dry_run=True, resume=True))
+    assert len(outputs) == 1
+    assert '"id": "three"' in outputs[0]
+
+    # Once the transcript changes behind its back, the sidecar is ignored and the
+    # two completed steps on disk are counted instead.
+    (workdir / "progress.json").write_text(
+        json.dumps({"completed": 0, "transcript_bytes": transcript.stat().st_size}), encoding="utf-8"
+    )
+    with transcript.open("a", encoding="utf-8") as fh:
+        fh.write('{"status":"error","step":9}\n')
+    outputs = run_script(str(script), config=RunnerConfig(workdir=str(workdir), dry_run=True, resume=True))
+    assert len(outputs) == 1
+    assert '"id": "three"' in outputs[0]
+
+
 def test_run_script_resume_seeded_state_and_transcript_continues_next_step_only(tmp_path):
     script = tmp_path / "demo.choom"
     script.write_text(
@@ -248,9 +283,11 @@ def test_run_script_passes_step_and_a1111_url_context_to_adapters(tmp_path, monk
     monkeypatch.setattr("choomlang.runner.run_adapter", fake_run_adapter)
 
     workdir = tmp_path / "run"
+    out = io.StringIO()
     outputs = run_script(
         str(script),
         config=RunnerConfig(workdir=str(workdir), dry_run=False, a1111_url="http://a1111:9000"),
+        out=out,
     )
 
     assert outputs == ["line 1: ok", "line 2: ok"]
@@ -258,12 +295,24 @@ def test_run_script_passes_step_and_a1111_url_context_to_adapters(tmp_path, monk
         {
             "name": "echo",
             "params": {"id": "first"},
-            "context": {"step": 1, "a1111_url": "http://a1111:9000", "a1111_timeout": None, "cancel_on_timeout": False},
+            "context": {
+                "step": 1,
+                "a1111_url": "http://a1111:9000",
+                "a1111_timeout": None,
+                "cancel_on_timeout": False,
+                "out": out,
+            },
         },
         {
             "name": "echo",
             "params": {"id": "second"},
-            "context": {"step": 2, "a1111_url": "http://a1111:9000", "a1111_timeout": None, "cancel_on_timeout": False},
+            "context": {
+                "step": 2,
+                "a1111_url": "http://a1111:9000",
+                "a1111_timeout": None,
+                "cancel_on_timeout": False,
+                "out": out,
+            },
         },
     ]
 
@@ -433,3 +482,32 @@ def test_run_script_does_not_summarize_non_relative_a1111_output_paths(tmp_path,
 
     record = json.loads((workdir / "transcript.jsonl").read_text(encoding="utf-8").strip())
     assert record["output"] == '["../bad.png"]'
+
+
+def test_run_script_replays_leftover_state_log_and_compacts_it(tmp_path):
+    script = tmp_path / "demo.choom"
+    script.write_text(
+        "toolcall tool name=echo id=first\n"
+        "toolcall tool name=echo msg=@second id=third\n",
+        encoding="utf-8",
+    )
+
+    workdir = tmp_path / "run"
+    workdir.mkdir()
+    (workdir / "state.json").write_text('{"second":"old"}', encoding="utf-8")
+    # An interrupted run leaves updates in the log, possibly with a torn last line.
+    (workdir / "state.jsonl").write_text('{"second":"new"}\n{"third":', encoding="utf-8")
+
+    outputs = run_script(str(script), config=RunnerConfig(workdir=str(workdir), dry_run=True))
+
+    assert outputs[1] == 'line 2: {"id": "third", "msg": "new"}'
+    assert not (workdir / "state.jsonl").exists()
+    state = json.loads((workdir / "state.json").read_text(encoding="utf-8"))
+    assert state["second"] == "new"
+    assert state["third"] == '{"id": "third", "msg": "new"}'
+    assert state["_runner"]["last_successful_step"] == 2
+
+
+def test_runner_config_uses_slots():
+    config = RunnerConfig(workdir="run", dry_run=True)
+    assert not hasattr(config, "__dict__")